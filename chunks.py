@@ -0,0 +1,141 @@
+from collections import OrderedDict
+import pygame
+
+from level import TILE_SIZE
+
+CHUNK_TILES = 8  # Chunks are CHUNK_TILES x CHUNK_TILES tiles
+MAX_CHUNKS = 24  # Pixel budget in unscaled chunks, about 15 MB at 8x8 tiles
+
+# ==========================
+# CHUNK RENDERER
+# ==========================
+class ChunkRenderer:
+    """A level's static tiles pre-drawn into square chunk surfaces.
+
+    A chunk is baked the first time the camera sees it, so drawing the level
+    is a handful of chunk blits instead of one blit per tile. When drawing
+    zoomed, each chunk is scaled once per zoom level and that copy is kept
+    too. Everything baked sits in one least-recently-used cache holding about
+    max_chunks unscaled chunks' worth of pixels; the chunks drawn in the
+    current frame are never evicted, so the budget can't make a wide
+    zoomed-out view thrash.
+
+    `tile_images` maps tile ids to the surface drawn for them; other tiles
+    are left transparent so the background shows through. After changing a
+    tile call mark_dirty() and only its chunk is baked again.
+    """
+    def __init__(self, level, tile_images, chunk_tiles=CHUNK_TILES, max_chunks=MAX_CHUNKS):
+        self.level = level
+        self.tile_images = tile_images
+        self.chunk_tiles = chunk_tiles
+        self.chunk_size = chunk_tiles * TILE_SIZE
+        self.max_pixels = max_chunks * self.chunk_size * self.chunk_size
+        self.chunks = OrderedDict()  # (chunk_x, chunk_y, zoom) -> [surface, frame last drawn], oldest first
+        self.pixels = 0
+        self.frame = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def clear(self):
+        """Drop every baked chunk, e.g. after the whole level changed"""
+        self.chunks.clear()
+        self.pixels = 0
+
+    def mark_dirty(self, row, col):
+        """Forget the chunk holding a tile, at every zoom, so it's baked again"""
+        chunk_x = col // self.chunk_tiles
+        chunk_y = row // self.chunk_tiles
+        for key in [key for key in self.chunks if key[0] == chunk_x and key[1] == chunk_y]:
+            surface = self.chunks.pop(key)[0]
+            self.pixels -= surface.get_width() * surface.get_height()
+
+    def bake(self, chunk_x, chunk_y):
+        level = self.level
+        tiles = level.tiles
+        cols = level.cols
+        surface = pygame.Surface((self.chunk_size, self.chunk_size), pygame.SRCALPHA)
+
+        first_row = chunk_y * self.chunk_tiles
+        first_col = chunk_x * self.chunk_tiles
+        for row in range(first_row, min(level.rows, first_row + self.chunk_tiles)):
+            for col in range(first_col, min(cols, first_col + self.chunk_tiles)):
+                image = self.tile_images.get(tiles[row * cols + col])
+                if image is not None:
+                    surface.blit(image, ((col - first_col) * TILE_SIZE, (row - first_row) * TILE_SIZE))
+
+        # Run-length encode the alpha so the empty parts of a chunk cost next to nothing to blit
+        surface.set_alpha(255, pygame.RLEACCEL)
+        return surface
+
+    def scaled_size(self, start, zoom):
+        """Screen width of the chunk starting at world coordinate `start`, without seams"""
+        return int((start + self.chunk_size) * zoom) - int(start * zoom)
+
+    def get_chunk(self, chunk_x, chunk_y, zoom=1.0):
+        key = (chunk_x, chunk_y, zoom)
+        entry = self.chunks.get(key)
+        if entry is not None:
+            self.chunks.move_to_end(key)
+            entry[1] = self.frame
+            self.hits += 1
+            return entry[0]
+
+        self.misses += 1
+        if zoom == 1.0:
+            surface = self.bake(chunk_x, chunk_y)
+        else:
+            size = self.chunk_size
+            width = self.scaled_size(chunk_x * size, zoom)
+            height = self.scaled_size(chunk_y * size, zoom)
+            # Scale from the unscaled chunk if it's cached, without caching it just for this
+            base = self.chunks.get((chunk_x, chunk_y, 1.0))
+            base = base[0] if base is not None else self.bake(chunk_x, chunk_y)
+            surface = pygame.transform.scale(base, (width, height))
+            surface.set_alpha(255, pygame.RLEACCEL)
+
+        self.chunks[key] = [surface, self.frame]
+        self.pixels += surface.get_width() * surface.get_height()
+        self.evict()
+        return surface
+
+    def evict(self):
+        """Drop the least recently drawn chunks until back under budget"""
+        while self.pixels > self.max_pixels:
+            key, (surface, frame) = next(iter(self.chunks.items()))
+            if frame == self.frame:
+                break  # Everything left is on screen right now
+            del self.chunks[key]
+            self.pixels -= surface.get_width() * surface.get_height()
+            self.evictions += 1
+
+    def draw(self, surface, camera_x, camera_y, zoom=1.0):
+        """Blit the chunks that overlap the camera view at a zoom level"""
+        self.frame += 1
+        size = self.chunk_size
+        width, height = surface.get_size()
+        last_chunk_x = (self.level.cols - 1) // self.chunk_tiles
+        last_chunk_y = (self.level.rows - 1) // self.chunk_tiles
+
+        first_x = max(0, int(camera_x // size))
+        first_y = max(0, int(camera_y // size))
+        last_x = min(last_chunk_x, int((camera_x + width / zoom - 1) // size))
+        last_y = min(last_chunk_y, int((camera_y + height / zoom - 1) // size))
+
+        # Scaled chunks are placed on whole screen pixels so neighbours meet exactly
+        screen_x = int(camera_x * zoom)
+        screen_y = int(camera_y * zoom)
+        for chunk_y in range(first_y, last_y + 1):
+            for chunk_x in range(first_x, last_x + 1):
+                surface.blit(self.get_chunk(chunk_x, chunk_y, zoom),
+                             (int(chunk_x * size * zoom) - screen_x, int(chunk_y * size * zoom) - screen_y))
+
+    def stats(self):
+        return {
+            "chunks": len(self.chunks),
+            "pixels": self.pixels,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions
+        }
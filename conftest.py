@@ -0,0 +1,16 @@
+import os
+import pytest
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+@pytest.fixture(scope="session", autouse=True)
+def headless_pygame():
+    """Sprites load from paths relative to the repo, onto a display surface"""
+    from engine import init_headless
+    previous_dir = os.getcwd()
+    os.chdir(REPO_DIR)
+    init_headless()
+    yield
+    os.chdir(previous_dir)
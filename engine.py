@@ -0,0 +1,183 @@
+import os
+import random
+import pygame
+
+from level import Level, TILE_SIZE, TILE_END, DEFAULT_START_POS
+from geometry import WallIndex, find_wall_rects
+from pickups import Flashlight, PickupIndex
+from player import Mario
+from race import generate_race_maze
+from timestep import TICK_RATE
+
+# Player light rules
+BASE_LIGHT_RADIUS = 80  # Initial light radius for player
+FLASHLIGHT_LIGHT_BONUS = 60  # Additional radius per flashlight
+
+def init_headless():
+    """Start pygame without a window, for simulations run outside the game.
+
+    Mario's sprites are converted for the display surface, and their size sets
+    his collision rect, so a 1x1 surface is opened on SDL's dummy driver
+    rather than none at all.
+    """
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    pygame.init()
+    if pygame.display.get_surface() is None:
+        pygame.display.set_mode((1, 1))
+
+# ==========================
+# INPUT
+# ==========================
+class HeldKeys:
+    """Key state for one tick, indexable like pygame.key.get_pressed()"""
+    def __init__(self, *keys):
+        self.keys = frozenset(keys)
+
+    def __getitem__(self, key):
+        return key in self.keys
+
+NO_KEYS = HeldKeys()
+
+# ==========================
+# SINGLE PLAYER
+# ==========================
+class LevelSim:
+    """One single-player run of a level, stepped one tick at a time.
+
+    Holds everything the rules need (player, wall colliders, flashlights and
+    exit) and nothing that draws, so it runs the same with or without a
+    window. step() takes the keys held during the tick.
+    """
+    def __init__(self, level, walls=None, tick_rate=TICK_RATE):
+        self.level = level
+        self.walls = walls if walls is not None else WallIndex(find_wall_rects(level, level.rows, level.cols))
+        self.tick_rate = tick_rate
+        start_x, start_y = level.start_pos or DEFAULT_START_POS
+        self.player = Mario(start_x, start_y)
+        self.flashlights = PickupIndex(Flashlight(x, y) for x, y in level.flashlight_positions)
+
+        end = level.find(TILE_END)
+        self.end_rect = pygame.Rect(end[1] * TILE_SIZE, end[0] * TILE_SIZE, TILE_SIZE, TILE_SIZE) if end else None
+
+        self.ticks = 0
+        self.flashlights_collected = 0
+        self.light_radius = BASE_LIGHT_RADIUS
+        self.won = False
+
+    @classmethod
+    def load(cls, level_name, folder="levels"):
+        level = Level.load(os.path.join(folder, f"{level_name}.json"), level_name)
+        level.use_default_positions()
+        return cls(level)
+
+    @property
+    def elapsed(self):
+        """Seconds of game time since the level started"""
+        return self.ticks / self.tick_rate
+
+    def step(self, keys):
+        """Advance one tick and return the flashlights collected during it"""
+        if self.won:
+            return []
+
+        self.player.update(self.walls, keys)
+        self.ticks += 1
+
+        collected = self.flashlights.collect(self.player.rect)
+        if collected:
+            self.flashlights_collected += len(collected)
+            self.light_radius = BASE_LIGHT_RADIUS + (self.flashlights_collected * FLASHLIGHT_LIGHT_BONUS)
+
+        # Check if player reached the end
+        if self.end_rect and self.player.collision_rect.colliderect(self.end_rect):
+            self.won = True
+        return collected
+
+    def run(self, inputs):
+        """Step once per key state in `inputs`, stopping early if the level is won"""
+        for keys in inputs:
+            self.step(keys)
+            if self.won:
+                break
+        return self
+
+    def state(self):
+        return {
+            "tick": self.ticks,
+            "elapsed": self.elapsed,
+            "player": self.player.rect.center,
+            "direction": self.player.direction,
+            "flashlights": self.flashlights_collected,
+            "light_radius": self.light_radius,
+            "won": self.won
+        }
+
+# ==========================
+# 2-PLAYER RACE
+# ==========================
+def get_race_finish_rect(maze):
+    """The 2x2 finish area at the bottom middle of a race maze"""
+    size = maze.cell_size
+    return pygame.Rect((maze.cols // 2 - 1) * size, (maze.rows - 2) * size, size * 2, size * 2)
+
+class RaceSim:
+    """One race between RacePlayers, stepped one tick at a time.
+
+    The race ends on the tick the first player reaches the finish; `winner`
+    is that player's name and each player's finish_time is in game seconds.
+    """
+    def __init__(self, maze, players, tick_rate=TICK_RATE):
+        self.maze = maze
+        self.players = players
+        self.tick_rate = tick_rate
+        self.finish_rect = get_race_finish_rect(maze)
+        self.ticks = 0
+        self.winner = None
+
+    @classmethod
+    def new(cls, players, cols, rows, cell_size=40, seed=None):
+        """Race on a freshly generated maze; the same seed gives the same maze"""
+        rng = random if seed is None else random.Random(seed)
+        return cls(generate_race_maze(cols, rows, cell_size, rng), players)
+
+    @property
+    def elapsed(self):
+        return self.ticks / self.tick_rate
+
+    @property
+    def won(self):
+        return self.winner is not None
+
+    def step(self, keys):
+        """Advance one tick with the keys held by both players"""
+        if self.won:
+            return
+
+        self.ticks += 1
+        current_time = self.elapsed
+
+        for player in self.players:
+            dx, dy = player.handle_input(keys)
+            player.move(dx, dy, self.maze)
+
+        for player in self.players:
+            if not player.finished and player.rect.colliderect(self.finish_rect):
+                player.finished = True
+                player.finish_time = current_time
+                if self.winner is None:
+                    self.winner = player.name
+
+    def run(self, inputs):
+        for keys in inputs:
+            self.step(keys)
+            if self.won:
+                break
+        return self
+
+    def state(self):
+        return {
+            "tick": self.ticks,
+            "elapsed": self.elapsed,
+            "players": [(player.name, player.x, player.y, player.finished) for player in self.players],
+            "winner": self.winner
+        }
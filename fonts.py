@@ -0,0 +1,67 @@
+from collections import OrderedDict
+import pygame
+
+MAX_TEXTS = 256  # Rendered strings kept around; HUD lines that change every frame cycle through
+
+# ==========================
+# TEXT CACHE
+# ==========================
+class TextCache:
+    """pygame's default font, opened once per size, and the text drawn with it.
+
+    Menus and HUDs draw the same strings every frame, so render() keeps each
+    rendered surface keyed by (text, size, color) in a least-recently-used
+    cache of max_texts entries. Text that changes every frame (timers) just
+    pushes old entries out. The returned surfaces are shared, so blit them
+    but don't draw on them.
+    """
+    def __init__(self, max_texts=MAX_TEXTS):
+        self.max_texts = max_texts
+        self.fonts = {}  # size -> pygame.font.Font
+        self.texts = OrderedDict()  # (text, size, color) -> surface, oldest first
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def font(self, size):
+        font = self.fonts.get(size)
+        if font is None:
+            font = self.fonts[size] = pygame.font.Font(None, size)
+        return font
+
+    def render(self, text, size, color):
+        """Antialiased `text` at a font size, rendered once and then reused"""
+        key = (text, size, tuple(color))
+        surface = self.texts.get(key)
+        if surface is not None:
+            self.texts.move_to_end(key)
+            self.hits += 1
+            return surface
+
+        self.misses += 1
+        surface = self.texts[key] = self.font(size).render(text, True, color)
+        if len(self.texts) > self.max_texts:
+            self.texts.popitem(last=False)
+            self.evictions += 1
+        return surface
+
+    def clear(self):
+        self.texts.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "fonts": len(self.fonts),
+            "texts": len(self.texts),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
+
+text_cache = TextCache()
+
+def render_text(text, size, color):
+    """Render text through the shared cache"""
+    return text_cache.render(text, size, color)
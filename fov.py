@@ -0,0 +1,152 @@
+from level import TILE_SIZE, TILE_WALL
+
+# Octant transforms for shadowcasting: (xx, xy, yx, yy) per octant
+OCTANTS = [
+    (1, 0, 0, 1),
+    (0, 1, 1, 0),
+    (0, -1, 1, 0),
+    (-1, 0, 0, 1),
+    (-1, 0, 0, -1),
+    (0, -1, -1, 0),
+    (0, 1, -1, 0),
+    (1, 0, 0, -1)
+]
+
+# ==========================
+# FIELD OF VIEW
+# ==========================
+class FieldOfView:
+    """Per-tile visibility for a level using recursive shadowcasting.
+
+    `visible` holds the tiles seen from the last computed origin and
+    `explored` every tile seen since the level was loaded; both are flat
+    bytearrays indexed by row * cols + col. `lit` holds the tiles reached by
+    the level's own light sources, which count as visible too.
+
+    Lights are given in pixels, as the lighting draws them: shadows are cast
+    from the centre of the light's tile, and a tile counts as reached when
+    its nearest point is within the radius of the light's exact position.
+    """
+    def __init__(self, grid, rows, cols):
+        self.grid = grid
+        self.tiles = grid.tiles
+        self.rows = rows
+        self.cols = cols
+        self.visible = bytearray(rows * cols)
+        self.explored = bytearray(rows * cols)
+        self.lit = bytearray(rows * cols)
+        self.visible_indices = []
+        self.origin = None
+        self.light = None  # (x, y, radius squared) of the light being cast
+
+    def is_visible(self, col, row):
+        if 0 <= row < self.rows and 0 <= col < self.cols:
+            index = row * self.cols + col
+            return self.visible[index] == 1 or self.lit[index] == 1
+        return False
+
+    def is_explored(self, col, row):
+        if 0 <= row < self.rows and 0 <= col < self.cols:
+            return self.explored[row * self.cols + col] == 1
+        return False
+
+    def is_blocking(self, col, row):
+        if 0 <= row < self.rows and 0 <= col < self.cols:
+            return self.tiles[row * self.cols + col] == TILE_WALL
+        return True
+
+    def mark_visible(self, col, row):
+        if 0 <= row < self.rows and 0 <= col < self.cols:
+            index = row * self.cols + col
+            if not self.visible[index]:
+                self.visible[index] = 1
+                self.explored[index] = 1
+                self.visible_indices.append(index)
+
+    def mark_lit(self, col, row):
+        if 0 <= row < self.rows and 0 <= col < self.cols:
+            self.lit[row * self.cols + col] = 1
+
+    def reaches(self, col, row):
+        """Whether the light being cast touches any part of a tile"""
+        x, y, radius_sq = self.light
+        left = col * TILE_SIZE
+        top = row * TILE_SIZE
+        nearest_x = min(max(x, left), left + TILE_SIZE)
+        nearest_y = min(max(y, top), top + TILE_SIZE)
+        return (nearest_x - x) ** 2 + (nearest_y - y) ** 2 <= radius_sq
+
+    def cast_from(self, x, y, radius, mark):
+        """Mark every tile a light at pixel (x, y) reaches within `radius` pixels"""
+        col = int(x // TILE_SIZE)
+        row = int(y // TILE_SIZE)
+        # Tiles `radius // TILE_SIZE + 1` rows away can still have a corner in range
+        tile_radius = int(radius // TILE_SIZE) + 1
+        self.light = (x, y, radius * radius)
+
+        mark(col, row)
+        for xx, xy, yx, yy in OCTANTS:
+            self.cast_light(col, row, 1, 1.0, 0.0, tile_radius, xx, xy, yx, yy, mark)
+
+    def set_static_lights(self, sources):
+        """Recompute the tiles lit by light sources given as pixel (x, y, radius)"""
+        self.lit = bytearray(self.rows * self.cols)
+        for x, y, radius in sources:
+            self.cast_from(x, y, radius, self.mark_lit)
+
+    def compute(self, x, y, radius):
+        """Recompute visible tiles for a light at pixel (x, y) reaching `radius` pixels"""
+        if self.origin == (x, y, radius):
+            return
+
+        for index in self.visible_indices:
+            self.visible[index] = 0
+        self.visible_indices = []
+        self.origin = (x, y, radius)
+
+        self.cast_from(x, y, radius, self.mark_visible)
+
+    def cast_light(self, origin_col, origin_row, distance, start_slope, end_slope, radius, xx, xy, yx, yy, mark):
+        """Scan one octant row by row, recursing around each wall it meets"""
+        if start_slope < end_slope:
+            return
+
+        new_start = start_slope
+
+        for depth in range(distance, radius + 1):
+            dx = -depth - 1
+            dy = -depth
+            blocked = False
+
+            while dx <= 0:
+                dx += 1
+                col = origin_col + dx * xx + dy * xy
+                row = origin_row + dx * yx + dy * yy
+
+                # Slopes of this tile's left and right edges
+                left_slope = (dx - 0.5) / (dy + 0.5)
+                right_slope = (dx + 0.5) / (dy - 0.5)
+
+                if start_slope < right_slope:
+                    continue
+                if end_slope > left_slope:
+                    break
+
+                if self.reaches(col, row):
+                    mark(col, row)
+
+                if blocked:
+                    if self.is_blocking(col, row):
+                        new_start = right_slope
+                        continue
+                    blocked = False
+                    start_slope = new_start
+                elif self.is_blocking(col, row) and depth < radius:
+                    # Scan the part of the next rows this wall doesn't shadow
+                    blocked = True
+                    self.cast_light(origin_col, origin_row, depth + 1, start_slope, left_slope,
+                                    radius, xx, xy, yx, yy, mark)
+                    new_start = right_slope
+
+            if blocked:
+                break
@@ -0,0 +1,252 @@
+import pygame
+
+from level import TILE_SIZE, TILE_WALL
+
+# ==========================
+# SPATIAL HASH
+# ==========================
+class SpatialHash:
+    """Uniform grid of buckets mapping world areas to item ids.
+
+    Items are registered by bounding box; query() returns the ids whose boxes
+    share a bucket with the query box, in ascending order, so callers that
+    depend on the original item order get the same order back.
+    """
+    def __init__(self, cell_size):
+        self.cell_size = cell_size
+        self.cells = {}
+
+    def cell_range(self, left, top, right, bottom):
+        size = self.cell_size
+        return (int(left // size), int(top // size), int(right // size), int(bottom // size))
+
+    def insert(self, item_id, left, top, right, bottom):
+        first_x, first_y, last_x, last_y = self.cell_range(left, top, right, bottom)
+        for cell_y in range(first_y, last_y + 1):
+            for cell_x in range(first_x, last_x + 1):
+                self.cells.setdefault((cell_x, cell_y), []).append(item_id)
+
+    def remove(self, item_id, left, top, right, bottom):
+        """Forget an item, given the same box it was inserted with"""
+        first_x, first_y, last_x, last_y = self.cell_range(left, top, right, bottom)
+        for cell_y in range(first_y, last_y + 1):
+            for cell_x in range(first_x, last_x + 1):
+                bucket = self.cells.get((cell_x, cell_y))
+                if bucket and item_id in bucket:
+                    bucket.remove(item_id)
+                    if not bucket:
+                        del self.cells[(cell_x, cell_y)]
+
+    def query(self, left, top, right, bottom):
+        first_x, first_y, last_x, last_y = self.cell_range(left, top, right, bottom)
+        found = set()
+        for cell_y in range(first_y, last_y + 1):
+            for cell_x in range(first_x, last_x + 1):
+                bucket = self.cells.get((cell_x, cell_y))
+                if bucket:
+                    found.update(bucket)
+        return sorted(found)
+
+# ==========================
+# WALL GEOMETRY
+# ==========================
+def find_wall_edges(grid, rows, cols, first_col=0, last_col=None, first_row=0, last_row=None):
+    """Return wall edges (x1, y1, x2, y2) in a block of tiles, merged into runs.
+
+    Only edges between a wall and an open tile are kept, with tiles outside
+    the level counting as walls (Level.is_wall). Consecutive edges on the
+    same grid line facing the same way become a single segment.
+    """
+    if last_col is None:
+        last_col = cols - 1
+    if last_row is None:
+        last_row = rows - 1
+
+    edges = []
+
+    # Horizontal edges: the line between tile rows (row - 1) and row
+    for row in range(first_row, last_row + 2):
+        run_start = None
+        run_side = None
+        for col in range(first_col, last_col + 2):
+            side = None
+            if col <= last_col:
+                above = grid.is_wall(row - 1, col)
+                below = grid.is_wall(row, col)
+                if above != below:
+                    side = above
+            if side != run_side:
+                if run_side is not None:
+                    edges.append((run_start * TILE_SIZE, row * TILE_SIZE, col * TILE_SIZE, row * TILE_SIZE))
+                run_start = col
+                run_side = side
+
+    # Vertical edges: the line between tile columns (col - 1) and col
+    for col in range(first_col, last_col + 2):
+        run_start = None
+        run_side = None
+        for row in range(first_row, last_row + 2):
+            side = None
+            if row <= last_row:
+                left = grid.is_wall(row, col - 1)
+                right = grid.is_wall(row, col)
+                if left != right:
+                    side = left
+            if side != run_side:
+                if run_side is not None:
+                    edges.append((col * TILE_SIZE, run_start * TILE_SIZE, col * TILE_SIZE, row * TILE_SIZE))
+                run_start = row
+                run_side = side
+
+    return edges
+
+def find_wall_rects(grid, rows, cols):
+    """Greedily merge wall tiles into as few rectangles as practical.
+
+    Tiles are scanned row by row. Each wall tile not yet covered starts a rect
+    that grows right along its row as far as it can, then down for as long as
+    every tile below it is an uncovered wall. Rects come out in scan order.
+    """
+    tiles = grid.tiles
+    covered = bytearray(rows * cols)
+    rects = []
+
+    for row in range(rows):
+        for col in range(cols):
+            index = row * cols + col
+            if tiles[index] != TILE_WALL or covered[index]:
+                continue
+
+            end_col = col + 1
+            while end_col < cols and tiles[index + end_col - col] == TILE_WALL and not covered[index + end_col - col]:
+                end_col += 1
+
+            end_row = row + 1
+            while end_row < rows:
+                start = end_row * cols
+                if any(tiles[start + c] != TILE_WALL or covered[start + c] for c in range(col, end_col)):
+                    break
+                end_row += 1
+
+            for r in range(row, end_row):
+                covered[r * cols + col:r * cols + end_col] = b"\x01" * (end_col - col)
+            rects.append(pygame.Rect(col * TILE_SIZE, row * TILE_SIZE,
+                                     (end_col - col) * TILE_SIZE, (end_row - row) * TILE_SIZE))
+
+    return rects
+
+class SegmentIndex:
+    """Line segments (x1, y1, x2, y2) bucketed in a SpatialHash by their bounds.
+
+    near() returns every segment whose bounding box shares a bucket with the
+    query box, which always includes the segments that touch it.
+    """
+    def __init__(self, segments, cell_size):
+        self.segments = segments
+        self.hash = SpatialHash(cell_size)
+        for index, (x1, y1, x2, y2) in enumerate(segments):
+            self.hash.insert(index, min(x1, x2), min(y1, y2), max(x1, x2), max(y1, y2))
+
+    def __len__(self):
+        return len(self.segments)
+
+    def __iter__(self):
+        return iter(self.segments)
+
+    def near(self, left, top, right, bottom):
+        """Return the segments in the buckets covered by a box, in list order"""
+        return [self.segments[index] for index in self.hash.query(left, top, right, bottom)]
+
+    def within(self, x, y, radius):
+        """Return the axis-aligned segments within `radius` of point (x, y), in list order"""
+        radius_sq = radius * radius
+        nearby = []
+        for segment in self.near(x - radius, y - radius, x + radius, y + radius):
+            x1, y1, x2, y2 = segment
+            # Closest point on an axis-aligned segment is a clamp per axis
+            closest_x = min(max(x, min(x1, x2)), max(x1, x2))
+            closest_y = min(max(y, min(y1, y2)), max(y1, y2))
+            if (closest_x - x) ** 2 + (closest_y - y) ** 2 <= radius_sq:
+                nearby.append(segment)
+        return nearby
+
+def sweep_interval(start, end, wall_start, wall_end, delta):
+    """(entry, exit) times of a moving span [start, end) over a wall's span.
+
+    Times are fractions of `delta`. A span that doesn't move overlaps for
+    all time or never, which gives (-inf, inf) or None.
+    """
+    if delta > 0:
+        return (wall_start - end) / delta, (wall_end - start) / delta
+    if delta < 0:
+        return (wall_end - start) / delta, (wall_start - end) / delta
+    if start < wall_end and end > wall_start:
+        return float("-inf"), float("inf")
+    return None
+
+class WallIndex:
+    """Wall rects bucketed in a SpatialHash for swept movement.
+
+    sweep() finds the first wall a rect meets along a whole move instead of
+    only looking at where the move ends, so fast moves can't skip a wall.
+    """
+    def __init__(self, walls, cell_size=TILE_SIZE):
+        self.walls = walls
+        self.hash = SpatialHash(cell_size)
+        for index, wall in enumerate(walls):
+            self.hash.insert(index, wall.left, wall.top, wall.right - 1, wall.bottom - 1)
+
+    def __len__(self):
+        return len(self.walls)
+
+    def __iter__(self):
+        return iter(self.walls)
+
+    def sweep(self, rect, dx, dy):
+        """First wall a pygame.Rect hits moving by (dx, dy), as (time, wall) or None.
+
+        Swept AABB: `time` is the fraction of the move made when the rect
+        starts to overlap the wall, 0 if it already does. Only the walls in
+        the buckets the whole move passes over are tested, so no wall is
+        skipped however far the rect travels. Ties go to the wall earlier in
+        `walls`.
+        """
+        if rect.width <= 0 or rect.height <= 0:
+            return None
+        left = rect.left + min(dx, 0)
+        top = rect.top + min(dy, 0)
+        right = rect.right + max(dx, 0)
+        bottom = rect.bottom + max(dy, 0)
+
+        first_hit = None
+        for index in self.hash.query(left, top, right - 1, bottom - 1):
+            wall = self.walls[index]
+            times_x = sweep_interval(rect.left, rect.right, wall.left, wall.right, dx)
+            times_y = sweep_interval(rect.top, rect.bottom, wall.top, wall.bottom, dy)
+            if times_x is None or times_y is None:
+                continue
+            entry = max(times_x[0], times_y[0])
+            exit = min(times_x[1], times_y[1])
+            # Touching at the end of the move isn't overlapping, as with colliderect
+            if entry >= exit or entry >= 1 or exit <= 0:
+                continue
+            entry = max(entry, 0.0)
+            if first_hit is None or entry < first_hit[0]:
+                first_hit = (entry, wall)
+        return first_hit
+
+class LevelGeometry:
+    """Wall geometry for one level, built once at load time.
+
+    Holds the merged wall edge segments bucketed in a SegmentIndex, so
+    lighting only looks at the edges near a light.
+    """
+    def __init__(self, grid, rows, cols, bucket_tiles=4):
+        self.rows = rows
+        self.cols = cols
+        self.segments = find_wall_edges(grid, rows, cols)
+        self.segment_index = SegmentIndex(self.segments, bucket_tiles * TILE_SIZE)
+
+    def segments_near(self, x, y, radius):
+        """Return the wall segments within `radius` of point (x, y)"""
+        return self.segment_index.within(x, y, radius)
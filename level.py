@@ -0,0 +1,130 @@
+import json
+
+# Shared tile settings for the game and the level editor
+TILE_SIZE = 50
+
+# Tile types
+TILE_EMPTY = 0
+TILE_WALL = 1
+TILE_START = 2
+TILE_END = 3
+TILE_FLASHLIGHT = 4
+
+# Where a level without start or end tiles puts them, in world pixels: the
+# middle and the bottom-right corner of the first 1200x800 screen
+DEFAULT_START_POS = (600, 400)
+DEFAULT_END_POS = (1100, 700)
+
+# ==========================
+# LEVEL
+# ==========================
+class Level:
+    """A maze level with its tiles in one flat bytearray.
+
+    Tile (row, col) lives at tiles[row * cols + col], one byte per tile, so a
+    level takes an eighth of the memory of a list of lists and whole-level
+    scans (count, find, positions_of) run over bytes in C.
+
+    start_pos, end_pos and flashlight_positions are tile centres in world
+    pixels and are refreshed by find_special_tiles(). Levels may lack a
+    start or end tile; use_default_positions() fills those in for play.
+    """
+    __slots__ = ("name", "rows", "cols", "tiles", "start_pos", "end_pos", "flashlight_positions", "dark")
+
+    def __init__(self, rows, cols, tiles=None, name=None, dark=False):
+        self.name = name
+        self.rows = rows
+        self.cols = cols
+        self.tiles = bytearray(tiles) if tiles is not None else bytearray(rows * cols)
+        self.dark = dark
+        self.start_pos = None
+        self.end_pos = None
+        self.flashlight_positions = []
+        self.find_special_tiles()
+
+    @classmethod
+    def from_grid(cls, grid, rows, cols, name=None, dark=False):
+        """Build a level from the nested-list grid stored in level files"""
+        tiles = bytearray(rows * cols)
+        for row in range(min(rows, len(grid))):
+            values = bytes(grid[row][:cols])
+            tiles[row * cols:row * cols + len(values)] = values
+        return cls(rows, cols, tiles, name, dark)
+
+    @classmethod
+    def load(cls, filepath, name=None):
+        with open(filepath, "r") as f:
+            data = json.load(f)
+        return cls.from_grid(data["grid"], data["rows"], data["cols"], data.get("name", name))
+
+    def to_grid(self):
+        """Nested lists of tile ids, the format level files use"""
+        cols = self.cols
+        return [list(self.tiles[row * cols:(row + 1) * cols]) for row in range(self.rows)]
+
+    def save(self, filepath):
+        data = {
+            "grid": self.to_grid(),
+            "rows": self.rows,
+            "cols": self.cols,
+            "name": self.name
+        }
+        with open(filepath, "w") as f:
+            json.dump(data, f)
+
+    # ---- Tile access ----
+    def get_tile(self, row, col):
+        return self.tiles[row * self.cols + col]
+
+    def set_tile(self, row, col, tile):
+        self.tiles[row * self.cols + col] = tile
+
+    def is_wall(self, row, col):
+        """Tiles outside the level count as walls"""
+        if row < 0 or row >= self.rows or col < 0 or col >= self.cols:
+            return True
+        return self.tiles[row * self.cols + col] == TILE_WALL
+
+    # ---- Bulk queries ----
+    def count(self, tile):
+        return self.tiles.count(bytes((tile,)))
+
+    def find(self, tile):
+        """(row, col) of the first tile of a type, or None"""
+        index = self.tiles.find(bytes((tile,)))
+        if index < 0:
+            return None
+        return divmod(index, self.cols)
+
+    def positions_of(self, tile):
+        """(row, col) of every tile of a type, in row order"""
+        needle = bytes((tile,))
+        positions = []
+        index = self.tiles.find(needle)
+        while index >= 0:
+            positions.append(divmod(index, self.cols))
+            index = self.tiles.find(needle, index + 1)
+        return positions
+
+    def clear(self):
+        self.tiles[:] = bytes(self.rows * self.cols)
+        self.find_special_tiles()
+
+    def tile_center(self, row, col):
+        return (col * TILE_SIZE + TILE_SIZE // 2, row * TILE_SIZE + TILE_SIZE // 2)
+
+    def find_special_tiles(self):
+        """Refresh the start, end and flashlight positions from the tiles"""
+        start = self.positions_of(TILE_START)
+        end = self.positions_of(TILE_END)
+        self.start_pos = self.tile_center(*start[-1]) if start else None
+        self.end_pos = self.tile_center(*end[-1]) if end else None
+        self.flashlight_positions = [self.tile_center(row, col)
+                                     for row, col in self.positions_of(TILE_FLASHLIGHT)]
+
+    def use_default_positions(self):
+        """Give a level saved without a start or end tile the default ones"""
+        if self.start_pos is None:
+            self.start_pos = DEFAULT_START_POS
+        if self.end_pos is None:
+            self.end_pos = DEFAULT_END_POS
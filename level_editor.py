@@ -2,6 +2,9 @@ import pygame
 import json
 import os
 import sys
+from level import Level, TILE_SIZE, TILE_EMPTY, TILE_WALL, TILE_START, TILE_END, TILE_FLASHLIGHT
+from chunks import ChunkRenderer
+from fonts import render_text
 
 pygame.init()
 
@@ -9,7 +12,6 @@ pygame.init()
 # SETTINGS
 # =====================
 WIDTH, HEIGHT = 800, 600
-TILE_SIZE = 50
 # Set level size to exactly 5x7 sections
 SECTION_COLS = 5  # 5 sections wide
 SECTION_ROWS = 7  # 7 sections tall
@@ -26,13 +28,6 @@ MIN_ZOOM = 0.25
 MAX_ZOOM = 3.0
 ZOOM_STEP = 0.25
 
-# Special tiles
-TILE_EMPTY = 0
-TILE_WALL = 1
-TILE_START = 2
-TILE_END = 3
-TILE_FLASHLIGHT = 4  # NEW: Flashlight item
-
 # Colors for special tiles
 COLOR_START = (0, 255, 0)  # Green for start
 COLOR_END = (255, 0, 0)    # Red for end
@@ -84,8 +79,7 @@ class Button:
         pygame.draw.rect(surface, color, self.rect, border_radius=8)
         pygame.draw.rect(surface, (255, 255, 255), self.rect, 2, border_radius=8)
         
-        font = pygame.font.Font(None, 28)
-        text_surf = font.render(self.text, True, (255, 255, 255))
+        text_surf = render_text(self.text, 28, (255, 255, 255))
         text_rect = text_surf.get_rect(center=self.rect.center)
         surface.blit(text_surf, text_rect)
     
@@ -173,14 +167,13 @@ wall_img = pygame.transform.scale(wall_img, (TILE_SIZE, TILE_SIZE))
 start_img = pygame.Surface((TILE_SIZE, TILE_SIZE), pygame.SRCALPHA)
 pygame.draw.rect(start_img, COLOR_START, (0, 0, TILE_SIZE, TILE_SIZE))
 pygame.draw.circle(start_img, (255, 255, 255), (TILE_SIZE//2, TILE_SIZE//2), TILE_SIZE//3)
-font_marker = pygame.font.Font(None, 36)
-start_text = font_marker.render("S", True, (0, 0, 0))
+start_text = render_text("S", 36, (0, 0, 0))
 start_img.blit(start_text, (TILE_SIZE//2 - start_text.get_width()//2, TILE_SIZE//2 - start_text.get_height()//2))
 
 end_img = pygame.Surface((TILE_SIZE, TILE_SIZE), pygame.SRCALPHA)
 pygame.draw.rect(end_img, COLOR_END, (0, 0, TILE_SIZE, TILE_SIZE))
 pygame.draw.circle(end_img, (255, 255, 255), (TILE_SIZE//2, TILE_SIZE//2), TILE_SIZE//3)
-end_text = font_marker.render("E", True, (0, 0, 0))
+end_text = render_text("E", 36, (0, 0, 0))
 end_img.blit(end_text, (TILE_SIZE//2 - end_text.get_width()//2, TILE_SIZE//2 - end_text.get_height()//2))
 
 # Create flashlight tile
@@ -196,7 +189,7 @@ for i in range(5):
     beam_surf = pygame.Surface((20 + i * 4, 8), pygame.SRCALPHA)
     beam_surf.fill(beam_color)
     flashlight_img.blit(beam_surf, (TILE_SIZE//2 - (10 + i * 2), TILE_SIZE//2 + 10 + i * 3))
-flashlight_text = font_marker.render("F", True, (0, 0, 0))
+flashlight_text = render_text("F", 36, (0, 0, 0))
 flashlight_img.blit(flashlight_text, (TILE_SIZE//2 - flashlight_text.get_width()//2, TILE_SIZE//2 + 8))
 
 # ==========================
@@ -359,18 +352,15 @@ class Player(pygame.sprite.Sprite):
 # =====================
 # GRID DATA
 # =====================
-grid = [[0 for _ in range(COLS)] for _ in range(ROWS)]
+grid = Level(ROWS, COLS)
+tile_images = {TILE_WALL: wall_img, TILE_START: start_img, TILE_END: end_img, TILE_FLASHLIGHT: flashlight_img}
+level_chunks = ChunkRenderer(grid, tile_images)
 
 player = Player(WIDTH // 2, HEIGHT // 2)
 
 def get_walls():
-    walls = []
-    for row in range(ROWS):
-        for col in range(COLS):
-            if grid[row][col] == TILE_WALL:
-                wall_rect = pygame.Rect(col * TILE_SIZE, row * TILE_SIZE, TILE_SIZE, TILE_SIZE)
-                walls.append(wall_rect)
-    return walls
+    return [pygame.Rect(col * TILE_SIZE, row * TILE_SIZE, TILE_SIZE, TILE_SIZE)
+            for row, col in grid.positions_of(TILE_WALL)]
 
 def zoom_in():
     global ZOOM_LEVEL
@@ -416,28 +406,23 @@ def save_level():
     folder = get_levels_folder()
     filepath = os.path.join(folder, f"{current_level_name}.json")
     
-    data = {
-        "grid": grid,
-        "rows": ROWS,
-        "cols": COLS,
-        "name": current_level_name
-    }
-    
-    with open(filepath, "w") as f:
-        json.dump(data, f)
+    grid.name = current_level_name
+    grid.save(filepath)
     
     print(f"✅ Level saved as: {current_level_name}")
 
 def load_level(level_name):
     """Load a specific level"""
-    global grid, current_level_name
+    global grid, level_chunks, current_level_name
     folder = get_levels_folder()
     filepath = os.path.join(folder, f"{level_name}.json")
     
     if os.path.exists(filepath):
         with open(filepath, "r") as f:
             data = json.load(f)
-            grid = data["grid"]
+            # Always edit at the editor's size, whatever size the file was saved at
+            grid = Level.from_grid(data["grid"], ROWS, COLS, data.get("name", level_name))
+            level_chunks = ChunkRenderer(grid, tile_images)
             current_level_name = data.get("name", level_name)
         print(f"📂 Level loaded: {current_level_name}")
         return True
@@ -460,8 +445,8 @@ def delete_level(level_name):
 
 def clear_all_walls():
     """Clear all walls from the maze"""
-    global grid
-    grid = [[0 for _ in range(COLS)] for _ in range(ROWS)]
+    grid.clear()
+    level_chunks.clear()
     print("🗑️ All walls cleared! Clean slate ready.")
 
 def toggle_edit_mode():
@@ -518,9 +503,10 @@ def draw_minimap():
                         (0, grid_y), (MINIMAP_WIDTH, grid_y), 1)
     
     # Draw tiles
+    tiles = grid.tiles
     for row in range(ROWS):
         for col in range(COLS):
-            tile = grid[row][col]
+            tile = tiles[row * COLS + col]
             if tile != TILE_EMPTY:
                 minimap_x = int(col * TILE_SIZE * scale_x)
                 minimap_y = int(row * TILE_SIZE * scale_y)
@@ -578,25 +564,14 @@ def draw_scrolling_background():
     screen.blit(background, (offset_x, offset_y))
 
 def draw_level():
-    level_surface = pygame.Surface((COLS * TILE_SIZE, ROWS * TILE_SIZE), pygame.SRCALPHA)
-    
-    for row in range(ROWS):
-        for col in range(COLS):
-            tile = grid[row][col]
-            if tile == TILE_WALL:
-                level_surface.blit(wall_img, (col * TILE_SIZE, row * TILE_SIZE))
-            elif tile == TILE_START:
-                level_surface.blit(start_img, (col * TILE_SIZE, row * TILE_SIZE))
-            elif tile == TILE_END:
-                level_surface.blit(end_img, (col * TILE_SIZE, row * TILE_SIZE))
-            elif tile == TILE_FLASHLIGHT:
-                level_surface.blit(flashlight_img, (col * TILE_SIZE, row * TILE_SIZE))
-    
-    scaled_width = int(COLS * TILE_SIZE * ZOOM_LEVEL)
-    scaled_height = int(ROWS * TILE_SIZE * ZOOM_LEVEL)
-    scaled_surface = pygame.transform.scale(level_surface, (scaled_width, scaled_height))
-    
-    screen.blit(scaled_surface, (-camera_x * ZOOM_LEVEL, -camera_y * ZOOM_LEVEL))
+    """Draw the chunks in view, scaled to the zoom level"""
+    level_chunks.draw(screen, camera_x, camera_y, ZOOM_LEVEL)
+
+def set_tile(row, col, tile):
+    """Change one tile and re-bake only the chunk it's in"""
+    if grid.get_tile(row, col) != tile:
+        grid.set_tile(row, col, tile)
+        level_chunks.mark_dirty(row, col)
 
 def draw_level_selector():
     """Draw the level load/delete selector"""
@@ -615,16 +590,14 @@ def draw_level_selector():
     pygame.draw.rect(screen, (50, 50, 70), (box_x, box_y, box_width, box_height), border_radius=10)
     pygame.draw.rect(screen, (255, 255, 255), (box_x, box_y, box_width, box_height), 3, border_radius=10)
     
-    font_title = pygame.font.Font(None, 40)
     title_text = "Load Level" if input_mode_type == "load" else "Delete Level"
-    title_surf = font_title.render(title_text, True, (255, 255, 255))
+    title_surf = render_text(title_text, 40, (255, 255, 255))
     screen.blit(title_surf, (box_x + 20, box_y + 20))
     
     levels = list_levels()
     
     if not levels:
-        font_msg = pygame.font.Font(None, 28)
-        msg_text = font_msg.render("No levels found!", True, (255, 100, 100))
+        msg_text = render_text("No levels found!", 28, (255, 100, 100))
         screen.blit(msg_text, (box_x + box_width // 2 - msg_text.get_width() // 2, box_y + 150))
         
         cancel_btn = Button(box_x + box_width // 2 - 80, box_y + box_height - 70, 160, 50, 
@@ -653,21 +626,18 @@ def draw_level_selector():
         buttons.append(btn)
     
     if scroll_offset > 0:
-        font_arrow = pygame.font.Font(None, 36)
-        up_arrow = font_arrow.render("▲", True, (255, 255, 255))
+        up_arrow = render_text("▲", 36, (255, 255, 255))
         screen.blit(up_arrow, (box_x + box_width // 2 - up_arrow.get_width() // 2, start_y - 30))
     
     if scroll_offset + max_visible < len(levels):
-        font_arrow = pygame.font.Font(None, 36)
-        down_arrow = font_arrow.render("▼", True, (255, 255, 255))
+        down_arrow = render_text("▼", 36, (255, 255, 255))
         screen.blit(down_arrow, (box_x + box_width // 2 - down_arrow.get_width() // 2, 
                                 start_y + max_visible * (button_height + 5) + 5))
     
-    font_small = pygame.font.Font(None, 24)
     if input_mode_type == "load":
-        instr_text = font_small.render("Click a level to load it", True, (200, 200, 200))
+        instr_text = render_text("Click a level to load it", 24, (200, 200, 200))
     else:
-        instr_text = font_small.render("Click a level to DELETE it (cannot be undone!)", True, (255, 150, 150))
+        instr_text = render_text("Click a level to DELETE it (cannot be undone!)", 24, (255, 150, 150))
     screen.blit(instr_text, (box_x + 20, box_y + box_height - 100))
     
     cancel_btn = Button(box_x + box_width // 2 - 80, box_y + box_height - 70, 160, 50, 
@@ -696,21 +666,18 @@ def draw_input_box():
     pygame.draw.rect(screen, (50, 50, 70), (box_x, box_y, box_width, box_height), border_radius=10)
     pygame.draw.rect(screen, (255, 255, 255), (box_x, box_y, box_width, box_height), 3, border_radius=10)
     
-    font_title = pygame.font.Font(None, 36)
-    title_text = font_title.render("Enter Level Name:", True, (255, 255, 255))
+    title_text = render_text("Enter Level Name:", 36, (255, 255, 255))
     screen.blit(title_text, (box_x + 20, box_y + 20))
     
     input_box_rect = pygame.Rect(box_x + 20, box_y + 70, box_width - 40, 40)
     pygame.draw.rect(screen, (30, 30, 40), input_box_rect, border_radius=5)
     pygame.draw.rect(screen, (100, 150, 255), input_box_rect, 2, border_radius=5)
     
-    font_input = pygame.font.Font(None, 32)
     cursor = "_" if (pygame.time.get_ticks() // 500) % 2 == 0 else ""
-    text_surface = font_input.render(input_text + cursor, True, (255, 255, 255))
+    text_surface = render_text(input_text + cursor, 32, (255, 255, 255))
     screen.blit(text_surface, (box_x + 30, box_y + 78))
     
-    font_small = pygame.font.Font(None, 24)
-    instr_text = font_small.render("ENTER to save | ESC to cancel", True, (200, 200, 200))
+    instr_text = render_text("ENTER to save | ESC to cancel", 24, (200, 200, 200))
     screen.blit(instr_text, (box_x + 20, box_y + 120))
 
 # =====================
@@ -854,7 +821,6 @@ while running:
     
     draw_minimap()
     
-    font = pygame.font.Font(None, 28)
     y_pos = 10
     
     tile_names = ['Empty', 'Wall', 'Start', 'End', 'Flashlight']
@@ -864,13 +830,13 @@ while running:
         f"Zoom: {ZOOM_LEVEL:.2f}x",
         f"Edit Mode: {'ON' if EDIT_MODE else 'OFF'}",
         f"Tile: {tile_names[current_tile]}",
-        f"Walls: {sum(1 for row in grid for tile in row if tile == TILE_WALL)}",
-        f"Flashlights: {sum(1 for row in grid for tile in row if tile == TILE_FLASHLIGHT)}"
+        f"Walls: {grid.count(TILE_WALL)}",
+        f"Flashlights: {grid.count(TILE_FLASHLIGHT)}"
     ]
     
     for text in info_texts:
         color = EDIT_MODE_COLOR if EDIT_MODE and "Edit Mode" in text else (255, 255, 255)
-        surf = font.render(text, True, color)
+        surf = render_text(text, 28, color)
         screen.blit(surf, (10, y_pos))
         y_pos += 30
     
@@ -933,19 +899,14 @@ while running:
             
             if 0 <= grid_x < COLS and 0 <= grid_y < ROWS:
                 if mouse_buttons[0]:
-                    if current_tile == TILE_START:
-                        for r in range(ROWS):
-                            for c in range(COLS):
-                                if grid[r][c] == TILE_START:
-                                    grid[r][c] = TILE_EMPTY
-                    elif current_tile == TILE_END:
-                        for r in range(ROWS):
-                            for c in range(COLS):
-                                if grid[r][c] == TILE_END:
-                                    grid[r][c] = TILE_EMPTY
-                    grid[grid_y][grid_x] = current_tile
+                    # Only one start and one end per level
+                    if current_tile == TILE_START or current_tile == TILE_END:
+                        for row, col in grid.positions_of(current_tile):
+                            if (row, col) != (grid_y, grid_x):
+                                set_tile(row, col, TILE_EMPTY)
+                    set_tile(grid_y, grid_x, current_tile)
                 elif mouse_buttons[2]:
-                    grid[grid_y][grid_x] = TILE_EMPTY
+                    set_tile(grid_y, grid_x, TILE_EMPTY)
 
     pygame.display.flip()
 
@@ -0,0 +1,729 @@
+import pygame
+import math
+import time
+
+from level import TILE_SIZE, TILE_WALL
+from geometry import find_wall_edges, SegmentIndex
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# ==========================
+# RAYCASTING
+# ==========================
+def cast_ray(start_x, start_y, angle, max_distance, grid, rows, cols):
+    """Cast a single ray and return the distance to the nearest wall.
+
+    Uses a grid traversal (Amanatides & Woo DDA): the ray jumps from one tile
+    boundary to the next, so only the tiles it actually crosses are checked and
+    the returned distance is the exact point where it enters a wall.
+    """
+    dx = math.cos(angle)
+    dy = math.sin(angle)
+    tiles = grid.tiles
+
+    grid_x = int(start_x // TILE_SIZE)
+    grid_y = int(start_y // TILE_SIZE)
+
+    # Ray starts outside the level or inside a wall
+    if grid_x < 0 or grid_x >= cols or grid_y < 0 or grid_y >= rows:
+        return 0
+    if tiles[grid_y * cols + grid_x] == TILE_WALL:
+        return 0
+
+    # Distance along the ray to the first vertical / horizontal tile boundary,
+    # and the distance between consecutive boundaries on each axis
+    if dx > 0:
+        step_x = 1
+        next_x = ((grid_x + 1) * TILE_SIZE - start_x) / dx
+        delta_x = TILE_SIZE / dx
+    elif dx < 0:
+        step_x = -1
+        next_x = (grid_x * TILE_SIZE - start_x) / dx
+        delta_x = -TILE_SIZE / dx
+    else:
+        step_x = 0
+        next_x = delta_x = math.inf
+
+    if dy > 0:
+        step_y = 1
+        next_y = ((grid_y + 1) * TILE_SIZE - start_y) / dy
+        delta_y = TILE_SIZE / dy
+    elif dy < 0:
+        step_y = -1
+        next_y = (grid_y * TILE_SIZE - start_y) / dy
+        delta_y = -TILE_SIZE / dy
+    else:
+        step_y = 0
+        next_y = delta_y = math.inf
+
+    while True:
+        # Step into whichever neighbouring tile the ray reaches first
+        if next_x < next_y:
+            distance = next_x
+            next_x += delta_x
+            grid_x += step_x
+        else:
+            distance = next_y
+            next_y += delta_y
+            grid_y += step_y
+
+        if distance >= max_distance:
+            return max_distance
+
+        # Leaving the level counts as a hit
+        if grid_x < 0 or grid_x >= cols or grid_y < 0 or grid_y >= rows:
+            return distance
+
+        if tiles[grid_y * cols + grid_x] == TILE_WALL:
+            return distance
+
+# ==========================
+# VISIBILITY POLYGON
+# ==========================
+CORNER_EPSILON = 0.0001  # Angle offset (radians) for rays that slip past a wall corner
+ARC_TOLERANCE = 1.0  # Max pixels the polygon may cut inside the light circle
+
+def get_wall_edges(x, y, radius, grid, rows, cols):
+    """Return the merged wall edges (x1, y1, x2, y2) in the tiles around a point"""
+    first_col = max(0, int((x - radius) // TILE_SIZE))
+    last_col = min(cols - 1, int((x + radius) // TILE_SIZE))
+    first_row = max(0, int((y - radius) // TILE_SIZE))
+    last_row = min(rows - 1, int((y + radius) // TILE_SIZE))
+    return find_wall_edges(grid, rows, cols, first_col, last_col, first_row, last_row)
+
+def get_arc_ray_count(radius, tolerance=ARC_TOLERANCE):
+    """Number of evenly spaced rays needed to trace the light circle smoothly"""
+    if radius <= tolerance:
+        return 8
+    step = 2 * math.acos(1 - tolerance / radius)
+    return max(8, int(math.ceil(2 * math.pi / step)))
+
+def compute_visibility_polygon(x, y, radius, grid, rows, cols, arc_tolerance=ARC_TOLERANCE, geometry=None):
+    """Return the outline of the area lit from (x, y), in world coordinates.
+
+    Rays are only cast towards the corners of nearby wall edges (plus one
+    either side of each corner), where those edges cross the light circle, and
+    at enough evenly spaced angles to follow the circle itself, so open areas
+    need few rays and corridors lose no slivers. Pass the level's
+    LevelGeometry to look the edges up instead of rescanning the grid.
+    """
+    angles = []
+
+    num_arc_rays = get_arc_ray_count(radius, arc_tolerance)
+    for i in range(num_arc_rays):
+        angles.append((i / num_arc_rays) * 2 * math.pi)
+
+    radius_sq = radius * radius
+    corners = set()
+    if geometry:
+        edges = geometry.segments_near(x, y, radius)
+    else:
+        edges = get_wall_edges(x, y, radius, grid, rows, cols)
+
+    for x1, y1, x2, y2 in edges:
+        corners.add((x1, y1))
+        corners.add((x2, y2))
+
+        # Where an edge leaves the light circle the outline switches between
+        # wall and arc, so that angle needs a ray of its own
+        if y1 == y2:
+            offset = y1 - y
+            if offset * offset <= radius_sq:
+                half_chord = math.sqrt(radius_sq - offset * offset)
+                for crossing_x in (x - half_chord, x + half_chord):
+                    if x1 < crossing_x < x2:
+                        angles.append(math.atan2(offset, crossing_x - x) % (2 * math.pi))
+        else:
+            offset = x1 - x
+            if offset * offset <= radius_sq:
+                half_chord = math.sqrt(radius_sq - offset * offset)
+                for crossing_y in (y - half_chord, y + half_chord):
+                    if y1 < crossing_y < y2:
+                        angles.append(math.atan2(crossing_y - y, offset) % (2 * math.pi))
+
+    for corner_x, corner_y in corners:
+        offset_x = corner_x - x
+        offset_y = corner_y - y
+        if offset_x * offset_x + offset_y * offset_y > radius_sq:
+            continue
+        angle = math.atan2(offset_y, offset_x) % (2 * math.pi)
+        angles.append(angle - CORNER_EPSILON)
+        angles.append(angle)
+        angles.append(angle + CORNER_EPSILON)
+
+    angles.sort()
+
+    points = []
+    for angle in angles:
+        hit_distance = cast_ray(x, y, angle, radius, grid, rows, cols)
+        points.append((x + math.cos(angle) * hit_distance, y + math.sin(angle) * hit_distance))
+
+    return points
+
+def get_segment_corners(segments):
+    """Return the segment endpoints where a wall ends or changes direction.
+
+    Points where exactly two collinear segments meet are skipped: a straight
+    wall continues through them, so they never cast a shadow edge.
+    """
+    directions = {}
+    for x1, y1, x2, y2 in segments:
+        length = math.hypot(x2 - x1, y2 - y1)
+        if length == 0:
+            continue
+        ux = (x2 - x1) / length
+        uy = (y2 - y1) / length
+        directions.setdefault((x1, y1), []).append((ux, uy))
+        directions.setdefault((x2, y2), []).append((-ux, -uy))
+
+    corners = []
+    for point, point_directions in directions.items():
+        if len(point_directions) == 2:
+            (ax, ay), (bx, by) = point_directions
+            if abs(ax + bx) < 1e-9 and abs(ay + by) < 1e-9:
+                continue
+        corners.append(point)
+    return corners
+
+def cast_segment_ray(x, y, angle, max_distance, segments):
+    """Distance along a ray to the nearest of `segments`, capped at max_distance"""
+    dx = math.cos(angle)
+    dy = math.sin(angle)
+    nearest = max_distance
+
+    for x1, y1, x2, y2 in segments:
+        edge_x = x2 - x1
+        edge_y = y2 - y1
+        denom = dx * edge_y - dy * edge_x
+        if denom == 0:
+            continue
+        offset_x = x1 - x
+        offset_y = y1 - y
+        t = (offset_x * edge_y - offset_y * edge_x) / denom
+        if t < 0 or t >= nearest:
+            continue
+        u = (offset_x * dy - offset_y * dx) / denom
+        if 0 <= u <= 1:
+            nearest = t
+
+    return nearest
+
+def compute_segment_visibility_polygon(x, y, radius, segments, corners):
+    """Return the outline of the area lit from (x, y) among wall line segments.
+
+    Works like compute_visibility_polygon, but for walls given as line
+    segments (the race maze) instead of a tile grid. `corners` should come
+    from get_segment_corners for the same segments.
+    """
+    radius_sq = radius * radius
+
+    # Only segments that can touch the light circle matter
+    nearby = []
+    for segment in segments:
+        x1, y1, x2, y2 = segment
+        if min(x1, x2) > x + radius or max(x1, x2) < x - radius:
+            continue
+        if min(y1, y2) > y + radius or max(y1, y2) < y - radius:
+            continue
+        nearby.append(segment)
+
+    angles = []
+    num_arc_rays = get_arc_ray_count(radius)
+    for i in range(num_arc_rays):
+        angles.append((i / num_arc_rays) * 2 * math.pi)
+
+    for corner_x, corner_y in corners:
+        offset_x = corner_x - x
+        offset_y = corner_y - y
+        if offset_x * offset_x + offset_y * offset_y > radius_sq:
+            continue
+        angle = math.atan2(offset_y, offset_x) % (2 * math.pi)
+        angles.append(angle - CORNER_EPSILON)
+        angles.append(angle)
+        angles.append(angle + CORNER_EPSILON)
+
+    # Angles where a wall leaves the light circle
+    for x1, y1, x2, y2 in nearby:
+        edge_x = x2 - x1
+        edge_y = y2 - y1
+        a = edge_x * edge_x + edge_y * edge_y
+        if a == 0:
+            continue
+        b = 2 * ((x1 - x) * edge_x + (y1 - y) * edge_y)
+        c = (x1 - x) * (x1 - x) + (y1 - y) * (y1 - y) - radius_sq
+        discriminant = b * b - 4 * a * c
+        if discriminant < 0:
+            continue
+        root = math.sqrt(discriminant)
+        for s in ((-b - root) / (2 * a), (-b + root) / (2 * a)):
+            if 0 < s < 1:
+                angles.append(math.atan2(y1 + edge_y * s - y, x1 + edge_x * s - x) % (2 * math.pi))
+
+    angles.sort()
+
+    points = []
+    for angle in angles:
+        hit_distance = cast_segment_ray(x, y, angle, radius, nearby)
+        points.append((x + math.cos(angle) * hit_distance, y + math.sin(angle) * hit_distance))
+
+    return points
+
+# ==========================
+# DARKNESS OVERLAY
+# ==========================
+DARKNESS_ALPHA = 240  # Alpha of unlit areas
+LIGHT_LAYERS = 8  # Gradient steps between the light's edge and its centre
+
+# Lighting quality tiers, best first. arc_tolerance is how far (px) the light
+# polygon may cut inside the light circle, which sets the number of arc rays;
+# scale is the resolution of the darkness buffer relative to the screen, full
+# only on the top tier.
+QUALITY_TIERS = [
+    {"name": "high", "arc_tolerance": 0.5, "layers": 16, "scale": 1.0},
+    {"name": "medium", "arc_tolerance": 1.0, "layers": LIGHT_LAYERS, "scale": 0.5},
+    {"name": "low", "arc_tolerance": 2.0, "layers": 6, "scale": 0.35},
+    {"name": "minimum", "arc_tolerance": 4.0, "layers": 4, "scale": 0.25}
+]
+DEFAULT_QUALITY_TIER = 1
+
+def build_light_stamp(radius, layers=LIGHT_LAYERS):
+    """Pre-render a radial falloff whose alpha is how much darkness to remove.
+
+    Rings are drawn from the outside in; each one removes the combined alpha of
+    every gradient layer it falls inside, so the centre ends up fully lit.
+    """
+    size = radius * 2 + 1
+    stamp = pygame.Surface((size, size), pygame.SRCALPHA)
+    stamp.fill((0, 0, 0, 0))
+
+    for layer in range(layers, 0, -1):
+        ring_radius = int(radius * layer / layers)
+        if ring_radius <= 0:
+            continue
+        light = get_layer_light(layer, layers)
+        pygame.draw.circle(stamp, (0, 0, 0, light), (radius, radius), ring_radius)
+
+    return stamp
+
+def get_layer_light(layer, layers=LIGHT_LAYERS):
+    """Darkness removed inside gradient ring `layer` (1 = innermost)"""
+    light = 0
+    for outer in range(layer, layers + 1):
+        light += int(230 * (1 - outer / layers))
+    return min(light, DARKNESS_ALPHA)
+
+class LightCompositor:
+    """Cut lights out of a persistent darkness buffer.
+
+    Each light radius gets one pre-rendered falloff stamp and a scratch mask of
+    the same size. Per light, the visibility polygon is filled into the mask,
+    multiplied by the stamp and subtracted from the buffer in a single blend.
+    Only the areas lit on the previous frame are reset to full darkness.
+
+    With a `scale` below 1 the buffer is kept at reduced resolution and
+    smoothly scaled up to the full size by get_output. Away from the lights
+    the buffer is flat darkness, so only the lit rects are resampled.
+    """
+    def __init__(self, width, height, darkness_alpha=DARKNESS_ALPHA, scale=1, layers=LIGHT_LAYERS):
+        self.width = width
+        self.height = height
+        self.darkness_alpha = darkness_alpha
+        self.scale = scale
+        self.layers = layers
+        buffer_size = (max(1, int(width * scale)), max(1, int(height * scale)))
+        self.surface = pygame.Surface(buffer_size, pygame.SRCALPHA)
+        self.surface.fill((0, 0, 0, darkness_alpha))
+        if scale != 1:
+            self.output = pygame.Surface((width, height), pygame.SRCALPHA)
+            self.output.fill((0, 0, 0, darkness_alpha))
+        else:
+            self.output = self.surface
+        self.output_dirty = True
+        self.output_rects = []
+        self.stamps = {}  # radius -> (stamp, mask)
+        self.lit_rects = []
+
+    def get_stamp(self, radius):
+        """Return the (stamp, mask) pair for a light radius, building it once"""
+        radius = int(radius)
+        if radius not in self.stamps:
+            stamp = build_light_stamp(radius, self.layers)
+            mask = pygame.Surface(stamp.get_size(), pygame.SRCALPHA)
+            self.stamps[radius] = (stamp, mask)
+        return self.stamps[radius]
+
+    def begin(self):
+        """Restore full darkness wherever the last frame placed light"""
+        for rect in self.lit_rects:
+            self.surface.fill((0, 0, 0, self.darkness_alpha), rect)
+        self.lit_rects = []
+        self.output_dirty = True
+
+    def to_buffer(self, points, center_x, center_y, radius):
+        """Convert screen-space light parameters to buffer space"""
+        if self.scale == 1:
+            return points, center_x, center_y, int(radius)
+        scale = self.scale
+        points = [(px * scale, py * scale) for px, py in points]
+        return points, center_x * scale, center_y * scale, int(radius * scale)
+
+    def add_light(self, points, center_x, center_y, radius):
+        """Light the polygon `points` (screen coordinates) around a centre"""
+        points, center_x, center_y, radius = self.to_buffer(points, center_x, center_y, radius)
+        if len(points) <= 2 or radius < 1:
+            return
+
+        stamp, mask = self.get_stamp(radius)
+        left = int(center_x) - radius
+        top = int(center_y) - radius
+
+        mask.fill((0, 0, 0, 0))
+        local_points = [(px - left, py - top) for px, py in points]
+        pygame.draw.polygon(mask, (255, 255, 255, 255), local_points)
+        mask.blit(stamp, (0, 0), special_flags=pygame.BLEND_RGBA_MULT)
+
+        self.surface.blit(mask, (left, top), special_flags=pygame.BLEND_RGBA_SUB)
+        self.lit_rects.append(pygame.Rect(left, top, mask.get_width(), mask.get_height()))
+        self.output_dirty = True
+
+    def get_output(self):
+        """Return the darkness at full screen size"""
+        if self.output_dirty and self.scale != 1:
+            self.upscale_lit_rects()
+        self.output_dirty = False
+        return self.output
+
+    def upscale_lit_rects(self):
+        """Resample the lit parts of the buffer into the full-size output"""
+        darkness = (0, 0, 0, self.darkness_alpha)
+        for rect in self.output_rects:
+            self.output.fill(darkness, rect)
+        self.output_rects = []
+
+        buffer_rect = self.surface.get_rect()
+        factor_x = self.width / buffer_rect.width
+        factor_y = self.height / buffer_rect.height
+        for rect in self.lit_rects:
+            # One extra pixel each side so the filtering matches a full-frame scale
+            source = rect.inflate(2, 2).clip(buffer_rect)
+            left = round(source.left * factor_x)
+            top = round(source.top * factor_y)
+            target = pygame.Rect(left, top, round(source.right * factor_x) - left,
+                                 round(source.bottom * factor_y) - top)
+            if target.width <= 0 or target.height <= 0:
+                continue
+            pygame.transform.smoothscale(self.surface.subsurface(source), target.size,
+                                         self.output.subsurface(target))
+            self.output_rects.append(target)
+
+class NumpyLightCompositor(LightCompositor):
+    """LightCompositor variant that does the per-pixel work with NumPy.
+
+    The falloff for each radius is read once from the same stamp the pygame
+    backend uses, so both darken the same pixels; each light then combines
+    it with the rasterised visibility mask and subtracts the result straight
+    from the buffer's alpha channel via surfarray.
+    """
+    def __init__(self, width, height, darkness_alpha=DARKNESS_ALPHA, scale=1, layers=LIGHT_LAYERS):
+        if numpy is None:
+            raise ImportError("The numpy lighting backend requires NumPy")
+        super().__init__(width, height, darkness_alpha, scale, layers)
+        self.falloffs = {}  # radius -> (falloff array, mask surface)
+
+    def get_falloff(self, radius):
+        """Return the (falloff, mask) pair for a light radius, building it once"""
+        radius = int(radius)
+        if radius not in self.falloffs:
+            falloff = pygame.surfarray.array_alpha(build_light_stamp(radius, self.layers))
+            mask = pygame.Surface((radius * 2 + 1, radius * 2 + 1), pygame.SRCALPHA)
+            self.falloffs[radius] = (falloff, mask)
+        return self.falloffs[radius]
+
+    def add_light(self, points, center_x, center_y, radius):
+        """Light the polygon `points` (screen coordinates) around a centre"""
+        points, center_x, center_y, radius = self.to_buffer(points, center_x, center_y, radius)
+        if len(points) <= 2 or radius < 1:
+            return
+
+        falloff, mask = self.get_falloff(radius)
+        left = int(center_x) - radius
+        top = int(center_y) - radius
+
+        mask.fill((0, 0, 0, 0))
+        local_points = [(px - left, py - top) for px, py in points]
+        pygame.draw.polygon(mask, (255, 255, 255, 255), local_points)
+
+        light_rect = pygame.Rect(left, top, mask.get_width(), mask.get_height())
+        clipped = light_rect.clip(self.surface.get_rect())
+        if clipped.width == 0 or clipped.height == 0:
+            return
+
+        # Slices of the light arrays that land on screen
+        local_x = slice(clipped.left - left, clipped.right - left)
+        local_y = slice(clipped.top - top, clipped.bottom - top)
+
+        # The mask is 255 inside the polygon and 0 outside, so the minimum
+        # keeps the falloff where the light can reach and zero elsewhere
+        mask_alpha = pygame.surfarray.pixels_alpha(mask)
+        light = numpy.minimum(mask_alpha[local_x, local_y], falloff[local_x, local_y])
+        del mask_alpha
+
+        darkness = pygame.surfarray.pixels_alpha(self.surface)
+        region = darkness[clipped.left:clipped.right, clipped.top:clipped.bottom]
+        numpy.subtract(region, numpy.minimum(region, light), out=region)
+        del region, darkness
+
+        self.lit_rects.append(clipped)
+        self.output_dirty = True
+
+LIGHTING_BACKENDS = {
+    "pygame": LightCompositor,
+    "numpy": NumpyLightCompositor
+}
+
+def get_lighting_backends():
+    """Names of the lighting backends usable in this environment"""
+    if numpy is None:
+        return ["pygame"]
+    return list(LIGHTING_BACKENDS)
+
+class LightingCache:
+    """Compositor, backend and quality tier behind a reused darkness overlay.
+
+    Subclasses build the overlay and record it under `overlay_key`; a frame
+    whose key matches the last one counts as a hit and reuses it as is.
+    """
+    def __init__(self, width, height, backend="pygame", quality=None):
+        self.width = width
+        self.height = height
+        self.backend = backend
+        self.quality = quality or QUALITY_TIERS[DEFAULT_QUALITY_TIER]
+        self.compositor = self.create_compositor()
+
+        self.grid = None
+        self.polygon = []  # The first visible light's polygon, for the debug HUD
+        self.overlay_key = None
+
+        self.hits = 0
+        self.misses = 0
+
+    def invalidate(self):
+        """Forget cached results, e.g. after loading a new level"""
+        self.grid = None
+        self.polygon = []
+        self.overlay_key = None
+
+    def create_compositor(self):
+        compositor_class = LIGHTING_BACKENDS[self.backend]
+        return compositor_class(self.width, self.height, DARKNESS_ALPHA,
+                                self.quality["scale"], self.quality["layers"])
+
+    def set_backend(self, backend):
+        """Switch the compositing backend; the next frame is rebuilt"""
+        if backend != self.backend:
+            self.backend = backend
+            self.compositor = self.create_compositor()
+            self.overlay_key = None
+
+    def set_quality(self, quality):
+        """Switch to another quality tier; the next frame is rebuilt"""
+        if quality is not self.quality:
+            self.quality = quality
+            self.compositor = self.create_compositor()
+            self.invalidate()
+
+    def stats(self):
+        """Return cache counters and the overlay hit rate"""
+        lookups = self.hits + self.misses
+        hit_rate = self.hits / lookups if lookups else 0.0
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": hit_rate
+        }
+
+class LightAccumulator(LightingCache):
+    """Composite every light source in view into one darkness overlay.
+
+    Lights are (world_x, world_y, radius) tuples. Lights whose reach misses
+    the camera are culled before any rays are cast, polygons are kept while a
+    light stays in view, and below the top quality tier the buffer is held at
+    reduced resolution and scaled up once per frame, so the cost follows the
+    lights on screen rather than the lights in the level or the screen size.
+    """
+    def __init__(self, width, height, backend="pygame", quality=None):
+        self.polygons = {}  # light -> polygon in world coordinates
+        self.visible_lights = 0
+        self.total_lights = 0
+        super().__init__(width, height, backend, quality)
+
+    def invalidate(self):
+        super().invalidate()
+        self.polygons = {}
+
+    def cull_lights(self, lights, camera_x, camera_y):
+        """Return the lights whose radius reaches into the camera view"""
+        view = pygame.Rect(camera_x, camera_y, self.width, self.height)
+        visible = []
+        for light in lights:
+            x, y, radius = light
+            if view.colliderect((x - radius, y - radius, radius * 2 + 1, radius * 2 + 1)):
+                visible.append(light)
+        return visible
+
+    def get_lights_overlay(self, lights, camera_x, camera_y, grid, rows, cols, geometry=None):
+        """Return a darkness surface with every visible light cut out"""
+        if grid is not self.grid:
+            self.invalidate()
+            self.grid = grid
+
+        visible = self.cull_lights(lights, camera_x, camera_y)
+        self.total_lights = len(lights)
+        self.visible_lights = len(visible)
+
+        overlay_key = (tuple(visible), (camera_x, camera_y))
+        if overlay_key == self.overlay_key:
+            self.hits += 1
+            return self.compositor.get_output()
+        self.misses += 1
+
+        # Keep the polygons of lights that are still in view, drop the rest
+        polygons = {}
+        for light in visible:
+            polygon = self.polygons.get(light)
+            if polygon is None:
+                x, y, radius = light
+                polygon = compute_visibility_polygon(x, y, radius, grid, rows, cols,
+                                                     self.quality["arc_tolerance"], geometry)
+            polygons[light] = polygon
+        self.polygons = polygons
+        self.polygon = polygons[visible[0]] if visible else []
+
+        self.compositor.begin()
+        for light in visible:
+            x, y, radius = light
+            points = [(px - camera_x, py - camera_y) for px, py in polygons[light]]
+            self.compositor.add_light(points, x - camera_x, y - camera_y, radius)
+
+        self.overlay_key = overlay_key
+        return self.compositor.get_output()
+
+    def stats(self):
+        """Return cache counters plus how many lights were drawn last frame"""
+        stats = super().stats()
+        stats["visible_lights"] = self.visible_lights
+        stats["total_lights"] = self.total_lights
+        return stats
+
+class RaceLighting:
+    """Wall-occluded darkness for 2-player dark races.
+
+    Each player's light is clipped by the race maze's wall segments near it,
+    found through a SegmentIndex, and all lights are composited into one
+    persistent buffer. Lights are given as (name, x, y); polygons are reused
+    for players that haven't moved, and nothing is redrawn while nobody moves.
+    """
+    def __init__(self, width, height, darkness_alpha=230, bucket_size=80):
+        self.compositor = LightCompositor(width, height, darkness_alpha)
+        self.bucket_size = bucket_size
+        self.walls = None
+        self.segment_index = None
+        self.corners = set()
+        self.polygons = {}  # player name -> (key, polygon)
+        self.frame_key = None
+
+    def set_walls(self, walls):
+        """Use a new maze; cached corners and polygons are rebuilt"""
+        self.walls = walls
+        self.segment_index = SegmentIndex(walls, self.bucket_size)
+        self.corners = set(get_segment_corners(walls))
+        self.polygons = {}
+        self.frame_key = None
+
+    def get_polygon(self, name, x, y, radius):
+        key = (x, y, radius)
+        cached = self.polygons.get(name)
+        if cached and cached[0] == key:
+            return cached[1]
+        # Any corner inside the light is an end of a wall segment that reaches it
+        nearby = self.segment_index.within(x, y, radius)
+        corners = []
+        for x1, y1, x2, y2 in nearby:
+            for point in ((x1, y1), (x2, y2)):
+                if point in self.corners and point not in corners:
+                    corners.append(point)
+        polygon = compute_segment_visibility_polygon(x, y, radius, nearby, corners)
+        self.polygons[name] = (key, polygon)
+        return polygon
+
+    def get_overlay(self, lights, radius, walls):
+        """Return the darkness surface with every player's light cut out"""
+        if walls is not self.walls:
+            self.set_walls(walls)
+
+        frame_key = tuple(lights) + (radius,)
+        if frame_key == self.frame_key:
+            return self.compositor.get_output()
+
+        self.compositor.begin()
+        for name, x, y in lights:
+            polygon = self.get_polygon(name, x, y, radius)
+            self.compositor.add_light(polygon, x, y, radius)
+
+        self.frame_key = frame_key
+        return self.compositor.get_output()
+
+# ==========================
+# QUALITY GOVERNOR
+# ==========================
+class QualityGovernor:
+    """Pick a lighting quality tier that keeps the lighting stage on budget.
+
+    Call begin() and end() around the lighting work each frame. The smoothed
+    frame time steps the tier down as soon as it exceeds the budget, and back
+    up once it has stayed well under budget for a while.
+    """
+    def __init__(self, budget_ms=16.6, tiers=QUALITY_TIERS, start_tier=DEFAULT_QUALITY_TIER):
+        self.budget_ms = budget_ms
+        self.tiers = tiers
+        self.tier_index = start_tier
+        self.average_ms = 0.0
+        self.last_ms = 0.0
+        self.smoothing = 0.1
+        self.upgrade_ratio = 0.5  # Only step up when this far under budget
+        self.cooldown_frames = 30  # Frames to wait after any tier change
+        self.cooldown = self.cooldown_frames
+        self.frame_start = None
+
+    @property
+    def tier(self):
+        return self.tiers[self.tier_index]
+
+    def begin(self):
+        self.frame_start = time.perf_counter()
+
+    def end(self):
+        """Record the frame's lighting time; return True if the tier changed"""
+        if self.frame_start is None:
+            return False
+        self.last_ms = (time.perf_counter() - self.frame_start) * 1000
+        self.frame_start = None
+        self.average_ms += (self.last_ms - self.average_ms) * self.smoothing
+
+        if self.cooldown > 0:
+            self.cooldown -= 1
+            return False
+
+        if self.average_ms > self.budget_ms and self.tier_index < len(self.tiers) - 1:
+            self.tier_index += 1
+        elif self.average_ms < self.budget_ms * self.upgrade_ratio and self.tier_index > 0:
+            self.tier_index -= 1
+        else:
+            return False
+
+        # Start measuring the new tier from scratch
+        self.cooldown = self.cooldown_frames
+        return True
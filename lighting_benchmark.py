@@ -0,0 +1,72 @@
+import os
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame
+from lighting import compute_visibility_polygon, get_lighting_backends, LIGHTING_BACKENDS
+from level import Level, TILE_EMPTY
+
+# =====================
+# SETTINGS
+# =====================
+WIDTH, HEIGHT = 1200, 800
+LEVEL_FILE = os.path.join("levels", "level6.json")
+RADII = [80, 140, 200, 320, 500, 800]  # BASE_LIGHT_RADIUS plus stacked flashlights
+FRAMES = 120
+
+pygame.init()
+pygame.display.set_mode((1, 1))
+
+def load_grid(filepath):
+    level = Level.load(filepath)
+    return level, level.rows, level.cols
+
+def find_open_spot(grid, rows, cols, radius):
+    """Pick the open tile with the largest light polygon so every pixel counts"""
+    best = None
+    best_size = -1
+    for row in range(1, rows - 1, 4):
+        for col in range(1, cols - 1, 4):
+            if grid.get_tile(row, col) != TILE_EMPTY:
+                continue
+            x = col * 50 + 25
+            y = row * 50 + 25
+            size = len(compute_visibility_polygon(x, y, radius, grid, rows, cols))
+            if size > best_size:
+                best = (x, y)
+                best_size = size
+    return best
+
+def benchmark(backend, grid, rows, cols, radius, light_x, light_y):
+    """Average milliseconds per frame to composite one light"""
+    compositor = LIGHTING_BACKENDS[backend](WIDTH, HEIGHT)
+    polygon = compute_visibility_polygon(light_x, light_y, radius, grid, rows, cols)
+
+    # Keep the light centred on screen, like the follow camera does
+    camera_x = light_x - WIDTH // 2
+    camera_y = light_y - HEIGHT // 2
+    points = [(px - camera_x, py - camera_y) for px, py in polygon]
+
+    start = time.perf_counter()
+    for _ in range(FRAMES):
+        compositor.begin()
+        compositor.add_light(points, light_x - camera_x, light_y - camera_y, radius)
+    return (time.perf_counter() - start) * 1000 / FRAMES
+
+if __name__ == "__main__":
+    grid, rows, cols = load_grid(LEVEL_FILE)
+    backends = get_lighting_backends()
+    if len(backends) < len(LIGHTING_BACKENDS):
+        print("⚠️ NumPy not installed, only benchmarking the pygame backend")
+
+    print(f"📊 Compositing one light, {FRAMES} frames per run ({LEVEL_FILE})")
+    print("radius  " + "  ".join(f"{name:>10}" for name in backends))
+    for radius in RADII:
+        light_x, light_y = find_open_spot(grid, rows, cols, radius)
+        timings = [benchmark(name, grid, rows, cols, radius, light_x, light_y) for name in backends]
+        print(f"{radius:>6}  " + "  ".join(f"{ms:>8.3f}ms" for ms in timings))
+
+    pygame.quit()
+    sys.exit()
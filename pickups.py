@@ -0,0 +1,154 @@
+import math
+import pygame
+
+from geometry import SpatialHash
+from level import TILE_SIZE
+
+PULSE_FRAMES = 64  # Steps in one flashlight pulse; update() moves about one step per tick
+
+flashlight_item_img = None
+flashlight_pulse_frames = None
+
+def get_flashlight_image():
+    """The flashlight item sprite, drawn the first time it's needed"""
+    global flashlight_item_img
+    if flashlight_item_img is None:
+        flashlight_item_img = pygame.Surface((TILE_SIZE, TILE_SIZE), pygame.SRCALPHA)
+        # Draw flashlight body
+        pygame.draw.rect(flashlight_item_img, (200, 200, 0), (TILE_SIZE//2 - 8, TILE_SIZE//2 - 15, 16, 25))
+        # Draw flashlight head
+        pygame.draw.circle(flashlight_item_img, (255, 255, 150), (TILE_SIZE//2, TILE_SIZE//2 - 15), 10)
+        # Draw light beam
+        for i in range(5):
+            alpha = 150 - i * 30
+            beam_y = TILE_SIZE//2 + 10 + i * 3
+            beam_width = 20 + i * 4
+            pygame.draw.ellipse(flashlight_item_img, (255, 255, 200, alpha),
+                                (TILE_SIZE//2 - beam_width//2, beam_y, beam_width, 8))
+    return flashlight_item_img
+
+def get_flashlight_pulse_frames():
+    """The flashlight's pulse pre-drawn as a (sprite, glow) pair per step.
+
+    Built the first time it's needed and shared by every flashlight, so
+    drawing one is two blits. Steps that come out the same size share a
+    surface, which keeps the whole atlas to a couple of dozen small images.
+    """
+    global flashlight_pulse_frames
+    if flashlight_pulse_frames is None:
+        image = get_flashlight_image()
+        sprites = {}
+        glows = {}
+        flashlight_pulse_frames = []
+        for frame in range(PULSE_FRAMES):
+            pulse = math.sin(frame * 2 * math.pi / PULSE_FRAMES)
+
+            scaled_size = int(TILE_SIZE * (1.0 + pulse * 0.1))
+            if scaled_size not in sprites:
+                sprites[scaled_size] = pygame.transform.scale(image, (scaled_size, scaled_size))
+
+            glow_radius = int(30 + pulse * 5)
+            if glow_radius not in glows:
+                glow = pygame.Surface((glow_radius * 2, glow_radius * 2), pygame.SRCALPHA)
+                pygame.draw.circle(glow, (255, 255, 0, 50), (glow_radius, glow_radius), glow_radius)
+                glows[glow_radius] = glow
+
+            flashlight_pulse_frames.append((sprites[scaled_size], glows[glow_radius]))
+    return flashlight_pulse_frames
+
+# ==========================
+# FLASHLIGHT CLASS
+# ==========================
+class Flashlight:
+    def __init__(self, x, y):
+        self.x = x
+        self.y = y
+        self.rect = pygame.Rect(x - 20, y - 20, 40, 40)
+        self.collected = False
+        self.pulse_offset = 0
+    
+    def update(self):
+        # Pulsing animation
+        self.pulse_offset = (self.pulse_offset + 0.1) % (2 * math.pi)
+    
+    def draw(self, surface, camera_x, camera_y):
+        if not self.collected:
+            # Draw with pulsing effect, from the pulse step nearest pulse_offset
+            frame = int(round(self.pulse_offset * PULSE_FRAMES / (2 * math.pi))) % PULSE_FRAMES
+            sprite, glow = get_flashlight_pulse_frames()[frame]
+            scaled_size = sprite.get_width()
+            surface.blit(sprite, (self.x - camera_x - scaled_size // 2, self.y - camera_y - scaled_size // 2))
+            
+            # Draw glow effect
+            glow_radius = glow.get_width() // 2
+            surface.blit(glow, (self.x - camera_x - glow_radius, self.y - camera_y - glow_radius))
+    
+    def check_collection(self, player_rect):
+        if not self.collected and self.rect.colliderect(player_rect):
+            self.collected = True
+            return True
+        return False
+
+# ==========================
+# PICKUP INDEX
+# ==========================
+class PickupIndex:
+    """Collectibles bucketed by the tiles their rects cover.
+
+    A pickup is anything with `rect`, `collected`, update(),
+    check_collection(rect) and draw(surface, camera_x, camera_y). Collection
+    only checks the pickups on the tiles under the player, and animation and
+    drawing only touch the pickups near the camera view, so a level with
+    hundreds of pickups costs about the same per frame as one with three.
+    """
+    def __init__(self, pickups=(), cell_size=TILE_SIZE, view_margin=TILE_SIZE):
+        self.pickups = list(pickups)
+        self.view_margin = view_margin  # Room for glows drawn outside a pickup's rect
+        self.hash = SpatialHash(cell_size)
+        self.active = []  # Uncollected pickups, in level order
+        for index, pickup in enumerate(self.pickups):
+            if not pickup.collected:
+                self.hash.insert(index, *self.bounds(pickup.rect))
+                self.active.append(pickup)
+
+    def __len__(self):
+        return len(self.pickups)
+
+    def __iter__(self):
+        return iter(self.pickups)
+
+    def bounds(self, rect):
+        """Inclusive pixel bounds of a pygame.Rect, as SpatialHash expects"""
+        return rect.left, rect.top, rect.right - 1, rect.bottom - 1
+
+    def near(self, left, top, right, bottom):
+        """Uncollected pickups whose tiles meet a box, in level order"""
+        return [self.pickups[index] for index in self.hash.query(left, top, right, bottom)]
+
+    def in_view(self, camera_x, camera_y, width, height):
+        margin = self.view_margin
+        return self.near(camera_x - margin, camera_y - margin,
+                         camera_x + width + margin, camera_y + height + margin)
+
+    def update(self, camera_x, camera_y, width, height):
+        """Animate the pickups the camera can see"""
+        for pickup in self.in_view(camera_x, camera_y, width, height):
+            pickup.update()
+
+    def collect(self, rect):
+        """Collect every pickup touching a pygame.Rect and return them"""
+        if rect.width <= 0 or rect.height <= 0:
+            return []
+        collected = []
+        for index in self.hash.query(*self.bounds(rect)):
+            pickup = self.pickups[index]
+            if pickup.check_collection(rect):
+                self.hash.remove(index, *self.bounds(pickup.rect))
+                self.active.remove(pickup)
+                collected.append(pickup)
+        return collected
+
+    def draw(self, surface, camera_x, camera_y):
+        width, height = surface.get_size()
+        for pickup in self.in_view(camera_x, camera_y, width, height):
+            pickup.draw(surface, camera_x, camera_y)
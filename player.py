@@ -22,6 +22,7 @@ class Mario:
         # Collision rect (smaller than visual sprite)
         self.collision_rect = pygame.Rect(0, 0, self.rect.width * 0.6, self.rect.height * 0.6)
         self.collision_rect.center = self.rect.center
+        self.previous_center = self.rect.center
         
         self.speed = 6
         self.is_walking = False
@@ -94,9 +95,8 @@ class Mario:
         
         return animations
 
-    def handle_input(self):
-        """Handle player input using WASD keys"""
-        keys = pygame.key.get_pressed()
+    def handle_input(self, keys):
+        """Handle player input using WASD keys, from pygame.key.get_pressed() or a recorded key state"""
         
         # WASD controls
         move_x = keys[pygame.K_d] - keys[pygame.K_a]  # A = left, D = right
@@ -146,48 +146,59 @@ class Mario:
             self.image = current_animation[self.current_frame]
             self.rect = self.image.get_rect(center=old_center)
 
-    def move(self, walls):
-        """Handle player movement with wall collision"""
-        move_x, move_y = self.handle_input()
+    def move(self, walls, keys):
+        """Handle player movement, swept against a geometry.WallIndex so it can't pass through walls"""
+        move_x, move_y = self.handle_input(keys)
         
-        old_x, old_y = self.rect.x, self.rect.y
         dx = move_x * self.speed
         dy = move_y * self.speed
         
-        # Move horizontally and check collisions
+        # Sweep horizontally and snap against the first wall along the way.
+        # Only the wall is used, not the time of impact: the snap keeps the
+        # whole sprite, not just the smaller collision rect, collision_buffer
+        # pixels off the wall, as the game always has
+        hit = walls.sweep(self.collision_rect, dx, 0)
         self.rect.x += dx
         self.collision_rect.centerx = self.rect.centerx
         
-        for wall in walls:
-            if self.collision_rect.colliderect(wall):
-                if dx > 0:  # Moving right
-                    self.rect.right = wall.left - self.collision_buffer
-                elif dx < 0:  # Moving left
-                    self.rect.left = wall.right + self.collision_buffer
-                self.collision_rect.centerx = self.rect.centerx
-                break
+        if hit:
+            wall = hit[1]
+            if dx > 0:  # Moving right
+                self.rect.right = wall.left - self.collision_buffer
+            elif dx < 0:  # Moving left
+                self.rect.left = wall.right + self.collision_buffer
+            self.collision_rect.centerx = self.rect.centerx
         
-        # Move vertically and check collisions
+        # Then vertically, so the player slides along walls it meets
+        hit = walls.sweep(self.collision_rect, 0, dy)
         self.rect.y += dy
         self.collision_rect.centery = self.rect.centery
         
-        for wall in walls:
-            if self.collision_rect.colliderect(wall):
-                if dy > 0:  # Moving down
-                    self.rect.bottom = wall.top - self.collision_buffer
-                elif dy < 0:  # Moving up
-                    self.rect.top = wall.bottom + self.collision_buffer
-                self.collision_rect.centery = self.rect.centery
-                break
+        if hit:
+            wall = hit[1]
+            if dy > 0:  # Moving down
+                self.rect.bottom = wall.top - self.collision_buffer
+            elif dy < 0:  # Moving up
+                self.rect.top = wall.bottom + self.collision_buffer
+            self.collision_rect.centery = self.rect.centery
         
         # Update collision rect
         self.collision_rect.center = self.rect.center
 
-    def update(self, walls):
-        """Update player state"""
-        self.move(walls)
+    def update(self, walls, keys):
+        """Advance the player by one simulation tick"""
+        self.previous_center = self.rect.center
+        self.move(walls, keys)
         self.animate()
 
-    def draw(self, surface, camera_x, camera_y):
-        """Draw player on surface with camera offset"""
-        surface.blit(self.image, (self.rect.x - camera_x, self.rect.y - camera_y))
\ No newline at end of file
+    def get_draw_center(self, alpha=1.0):
+        """Centre point `alpha` of the way from the previous tick to the current one"""
+        previous_x, previous_y = self.previous_center
+        center_x, center_y = self.rect.center
+        return (round(previous_x + (center_x - previous_x) * alpha),
+                round(previous_y + (center_y - previous_y) * alpha))
+
+    def draw(self, surface, camera_x, camera_y, alpha=1.0):
+        """Draw player on surface with camera offset, interpolated between ticks"""
+        draw_rect = self.image.get_rect(center=self.get_draw_center(alpha))
+        surface.blit(self.image, (draw_rect.x - camera_x, draw_rect.y - camera_y))
\ No newline at end of file
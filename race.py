@@ -0,0 +1,319 @@
+import math
+import pygame
+import random
+
+from fonts import render_text
+
+# Wall bits of a race maze cell
+WALL_TOP = 1
+WALL_RIGHT = 2
+WALL_BOTTOM = 4
+WALL_LEFT = 8
+ALL_WALLS = WALL_TOP | WALL_RIGHT | WALL_BOTTOM | WALL_LEFT
+
+# Carving directions: (row step, col step, wall on this cell, wall on the neighbour)
+DIRECTIONS = [
+    (-1, 0, WALL_TOP, WALL_BOTTOM),
+    (0, 1, WALL_RIGHT, WALL_LEFT),
+    (1, 0, WALL_BOTTOM, WALL_TOP),
+    (0, -1, WALL_LEFT, WALL_RIGHT)
+]
+
+# ==========================
+# RACE MAZE
+# ==========================
+class RaceMaze:
+    """Cell maze for 2-player race mode.
+
+    Each cell keeps its four walls as bits in one byte of `cells` (indexed by
+    row * cols + col). A line between two cells is a wall if either cell has
+    its side set, and the outer boundary is always solid. Line segments for
+    drawing and lighting are only built when wall_lines is first read.
+    """
+    def __init__(self, cols, rows, cell_size=40):
+        self.cols = cols
+        self.rows = rows
+        self.cell_size = cell_size
+        self.cells = bytearray([ALL_WALLS]) * (cols * rows)
+        self._wall_lines = None
+
+    def has_wall(self, row, col, side):
+        return self.cells[row * self.cols + col] & side != 0
+
+    def remove_wall(self, row, col, side):
+        self.cells[row * self.cols + col] &= ~side & ALL_WALLS
+        self._wall_lines = None
+
+    def has_horizontal_wall(self, line_row, col):
+        """Whether the line above cell row `line_row` is solid at column `col`"""
+        if col < 0 or col >= self.cols or line_row < 0 or line_row > self.rows:
+            return False
+        if line_row == 0 or line_row == self.rows:
+            return True
+        return (self.has_wall(line_row - 1, col, WALL_BOTTOM) or
+                self.has_wall(line_row, col, WALL_TOP))
+
+    def has_vertical_wall(self, row, line_col):
+        """Whether the line left of cell column `line_col` is solid at row `row`"""
+        if row < 0 or row >= self.rows or line_col < 0 or line_col > self.cols:
+            return False
+        if line_col == 0 or line_col == self.cols:
+            return True
+        return (self.has_wall(row, line_col - 1, WALL_RIGHT) or
+                self.has_wall(row, line_col, WALL_LEFT))
+
+    def carve(self, start_row=0, start_col=0, rng=random):
+        """Carve passages with depth-first backtracking, without recursion.
+
+        `rng` is anything with shuffle(), e.g. a seeded random.Random for a
+        maze that can be generated again.
+        """
+        visited = bytearray(self.cols * self.rows)
+        visited[start_row * self.cols + start_col] = 1
+        directions = DIRECTIONS[:]
+        rng.shuffle(directions)
+        stack = [(start_row, start_col, directions, 0)]
+
+        while stack:
+            row, col, directions, next_direction = stack[-1]
+            if next_direction == len(directions):
+                stack.pop()
+                continue
+            stack[-1] = (row, col, directions, next_direction + 1)
+
+            dr, dc, wall, opposite = directions[next_direction]
+            new_row, new_col = row + dr, col + dc
+            if 0 <= new_row < self.rows and 0 <= new_col < self.cols and not visited[new_row * self.cols + new_col]:
+                self.remove_wall(row, col, wall)
+                self.remove_wall(new_row, new_col, opposite)
+                visited[new_row * self.cols + new_col] = 1
+                directions = DIRECTIONS[:]
+                rng.shuffle(directions)
+                stack.append((new_row, new_col, directions, 0))
+
+    def open_start_and_finish(self):
+        """Clear the walls inside both start areas and the finish area"""
+        # Player 1 start area (top-left 2x2)
+        for row in range(2):
+            for col in range(2):
+                if col == 0:
+                    self.remove_wall(row, col, WALL_LEFT)
+                self.remove_wall(row, col, WALL_TOP)
+
+        # Player 2 start area (top-right 2x2)
+        for row in range(2):
+            for col in range(self.cols - 2, self.cols):
+                if col == self.cols - 1:
+                    self.remove_wall(row, col, WALL_RIGHT)
+                self.remove_wall(row, col, WALL_TOP)
+
+        # Finish area (bottom-middle 2x2)
+        finish_col = self.cols // 2 - 1
+        for row in range(self.rows - 2, self.rows):
+            for col in range(finish_col, finish_col + 2):
+                self.remove_wall(row, col, WALL_BOTTOM)
+
+    @property
+    def wall_lines(self):
+        """Wall line segments (x1, y1, x2, y2), built on first use"""
+        if self._wall_lines is None:
+            size = self.cell_size
+            width = self.cols * size
+            height = self.rows * size
+
+            # Outer boundary walls (prevent players from going outside)
+            lines = [
+                (0, 0, width, 0),
+                (width, 0, width, height),
+                (0, height, width, height),
+                (0, 0, 0, height)
+            ]
+            for row in range(self.rows):
+                for col in range(self.cols):
+                    x = col * size
+                    y = row * size
+                    cell = self.cells[row * self.cols + col]
+                    if cell & WALL_TOP:
+                        lines.append((x, y, x + size, y))
+                    if cell & WALL_RIGHT:
+                        lines.append((x + size, y, x + size, y + size))
+                    if cell & WALL_BOTTOM:
+                        lines.append((x, y + size, x + size, y + size))
+                    if cell & WALL_LEFT:
+                        lines.append((x, y, x, y + size))
+            self._wall_lines = lines
+        return self._wall_lines
+
+    def collides(self, rect):
+        """Whether any wall touches the outline of a pygame.Rect.
+
+        Only the wall lines of the cells under the rect are looked at. A wall
+        counts when it crosses or touches one of the rect's edges, the same
+        test as intersecting the wall line with each edge in turn.
+        """
+        size = self.cell_size
+        left, top, right, bottom = rect.left, rect.top, rect.right, rect.bottom
+        first_col = left // size - 1
+        last_col = right // size
+        first_row = top // size - 1
+        last_row = bottom // size
+
+        # Horizontal walls between the rect's top and bottom edges
+        for line_row in range(-(-top // size), bottom // size + 1):
+            for col in range(first_col, last_col + 1):
+                x1 = col * size
+                x2 = x1 + size
+                if (x1 <= left <= x2 or x1 <= right <= x2) and self.has_horizontal_wall(line_row, col):
+                    return True
+
+        # Vertical walls between the rect's left and right edges
+        for line_col in range(-(-left // size), right // size + 1):
+            for row in range(first_row, last_row + 1):
+                y1 = row * size
+                y2 = y1 + size
+                if (y1 <= top <= y2 or y1 <= bottom <= y2) and self.has_vertical_wall(row, line_col):
+                    return True
+
+        return False
+
+def generate_race_maze(cols, rows, cell_size=40, rng=random):
+    """Generate a maze for 2-player race using depth-first backtracking"""
+    maze = RaceMaze(cols, rows, cell_size)
+    maze.carve(0, 0, rng)
+    maze.open_start_and_finish()
+    return maze
+
+# ==========================
+# RACE PLAYER
+# ==========================
+class RacePlayer:
+    def __init__(self, x, y, color, controls, name):
+        self.x = x
+        self.y = y
+        self.color = color
+        self.controls = controls  # Dictionary with keys: up, down, left, right
+        self.name = name
+        self.speed = 6
+        self.radius = 12
+        self.rect = pygame.Rect(x - self.radius, y - self.radius, self.radius * 2, self.radius * 2)
+        self.sweep_step = self.radius  # Longest sub-step of a sweep, short enough not to skip a wall line
+        self.previous_x = x
+        self.previous_y = y
+        self.finished = False
+        self.finish_time = 0
+
+    def handle_input(self, keys):
+        if self.finished:
+            return 0, 0
+
+        dx = 0
+        dy = 0
+
+        if keys[self.controls['left']]:
+            dx -= self.speed
+        if keys[self.controls['right']]:
+            dx += self.speed
+        if keys[self.controls['up']]:
+            dy -= self.speed
+        if keys[self.controls['down']]:
+            dy += self.speed
+
+        # Normalize diagonal movement
+        if dx != 0 and dy != 0:
+            dx *= 0.707
+            dy *= 0.707
+
+        return dx, dy
+
+    def move(self, dx, dy, maze):
+        """Advance the player by one simulation tick"""
+        self.previous_x = self.x
+        self.previous_y = self.y
+        if self.finished:
+            return
+
+        # Slide: sweep horizontally, then vertically from wherever that stopped
+        self.sweep(dx, 0, maze)
+        self.sweep(0, dy, maze)
+        
+        # Update rect
+        self.rect = pygame.Rect(self.x - self.radius, self.y - self.radius, self.radius * 2, self.radius * 2)
+
+    def sweep(self, dx, dy, maze):
+        """Move along one axis up to the first wall and return the fraction of the move made.
+
+        The move is tested in sub-steps no longer than sweep_step, so not even
+        a zero-thickness wall line can be jumped over, and the last whole
+        pixel before the wall is then found by bisection. A move that hits
+        nothing ends exactly at (x + dx, y + dy).
+        """
+        horizontal = dx != 0
+        delta = dx if horizontal else dy
+        if delta == 0:
+            return 1.0
+
+        size = self.radius * 2
+        start = self.x if horizontal else self.y
+        # Rect edge across the move, truncated as pygame.Rect does
+        across = int((self.y if horizontal else self.x) - self.radius)
+
+        def blocked(edge):
+            if horizontal:
+                return maze.collides(pygame.Rect(edge, across, size, size))
+            return maze.collides(pygame.Rect(across, edge, size, size))
+
+        steps = math.ceil(abs(delta) / self.sweep_step)
+        previous = start
+        blocked_at = None
+        for step in range(1, steps + 1):
+            position = start + delta * step / steps
+            if blocked(int(position - self.radius)):
+                blocked_at = position
+                break
+            previous = position
+
+        if blocked_at is None:
+            end = start + delta
+        else:
+            free = int(previous - self.radius)
+            if previous == start and blocked(free):
+                return 0.0  # Already touching a wall, stay put
+            hit = int(blocked_at - self.radius)
+            while abs(hit - free) > 1:
+                middle = free + (hit - free) // 2
+                if blocked(middle):
+                    hit = middle
+                else:
+                    free = middle
+            contact = free + self.radius
+            end = max(start, contact) if delta > 0 else min(start, contact)
+
+        if horizontal:
+            self.x = end
+        else:
+            self.y = end
+        return (end - start) / delta
+
+    def get_draw_position(self, alpha=1.0):
+        """Position `alpha` of the way from the previous tick to the current one"""
+        return (self.previous_x + (self.x - self.previous_x) * alpha,
+                self.previous_y + (self.y - self.previous_y) * alpha)
+
+    def draw(self, surface, winner=None, alpha=1.0):
+        x, y = self.get_draw_position(alpha)
+
+        # Draw player as circle
+        pygame.draw.circle(surface, (255, 255, 255), (int(x), int(y)), self.radius + 2)
+        pygame.draw.circle(surface, self.color, (int(x), int(y)), self.radius)
+
+        # Draw inner shine
+        pygame.draw.circle(surface, (255, 255, 255), (int(x - 4), int(y - 4)), 4)
+
+        # Draw name
+        name_text = render_text(self.name, 24, (255, 255, 255))
+        surface.blit(name_text, (int(x - name_text.get_width() // 2), int(y - 30)))
+
+        # Draw crown if finished first (winner)
+        if self.finished and winner == self.name:
+            crown = render_text("👑", 36, (255, 215, 0))
+            surface.blit(crown, (int(x - 15), int(y - 35)))
@@ -0,0 +1,91 @@
+import os
+import sys
+import random
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame
+from race import RacePlayer, generate_race_maze
+from race_swarm import RaceSwarm, numpy
+
+# =====================
+# SETTINGS
+# =====================
+RACE_COLS, RACE_ROWS, CELL_SIZE = 30, 20, 40  # Same maze as the game's race mode
+SWARM_SIZES = [10, 100, 1000, 10000]
+TICKS = 600  # Ten seconds of race at 60 ticks per second
+CHECK_AGENTS = 50  # Agents also stepped one RacePlayer at a time to compare
+SEED = 1
+
+# Per-agent controls: indices into the tuple of held keys
+BOT_CONTROLS = {'left': 0, 'right': 1, 'up': 2, 'down': 3}
+
+def make_bot_inputs(agents, ticks, rng):
+    """Random key holds per tick: each bot keeps a direction for a while then picks another"""
+    inputs = []
+    move_x = [0] * agents
+    move_y = [0] * agents
+    for _ in range(ticks):
+        for agent in range(agents):
+            if rng.random() < 0.05:
+                move_x[agent] = rng.choice((-1, 0, 1))
+                move_y[agent] = rng.choice((-1, 0, 1))
+        inputs.append((list(move_x), list(move_y)))
+    return inputs
+
+def make_spawns(agents, rng):
+    """Start every bot in the middle of a random cell"""
+    return [((rng.randrange(RACE_COLS) + 0.5) * CELL_SIZE, (rng.randrange(RACE_ROWS) + 0.5) * CELL_SIZE)
+            for _ in range(agents)]
+
+def run_players(maze, spawns, inputs):
+    """Step RacePlayers one at a time, the way the game does"""
+    players = [RacePlayer(x, y, (255, 255, 255), BOT_CONTROLS, f"Bot {i}") for i, (x, y) in enumerate(spawns)]
+    start = time.perf_counter()
+    for move_x, move_y in inputs:
+        for player, mx, my in zip(players, move_x, move_y):
+            keys = (mx < 0, mx > 0, my < 0, my > 0)
+            dx, dy = player.handle_input(keys)
+            player.move(dx, dy, maze)
+    return players, time.perf_counter() - start
+
+def run_swarm(maze, spawns, inputs):
+    """Step the whole swarm at once"""
+    swarm = RaceSwarm(maze, [x for x, _ in spawns], [y for _, y in spawns])
+    moves = [(numpy.array(move_x), numpy.array(move_y)) for move_x, move_y in inputs]
+    start = time.perf_counter()
+    for move_x, move_y in moves:
+        dx, dy = swarm.velocities(move_x, move_y)
+        swarm.step(dx, dy)
+    return swarm, time.perf_counter() - start
+
+if __name__ == "__main__":
+    if numpy is None:
+        print("❌ The race swarm needs NumPy")
+        sys.exit(1)
+
+    pygame.init()
+    random.seed(SEED)
+    maze = generate_race_maze(RACE_COLS, RACE_ROWS, CELL_SIZE)
+    rng = random.Random(SEED)
+
+    # Same inputs through both paths must land every agent in the same place
+    spawns = make_spawns(CHECK_AGENTS, rng)
+    inputs = make_bot_inputs(CHECK_AGENTS, TICKS, rng)
+    players, player_seconds = run_players(maze, spawns, inputs)
+    swarm, _ = run_swarm(maze, spawns, inputs)
+    mismatches = sum(1 for i, player in enumerate(players)
+                     if player.x != swarm.x[i] or player.y != swarm.y[i])
+    print(f"🔍 {CHECK_AGENTS} agents x {TICKS} ticks: {mismatches} mismatches against RacePlayer")
+    print(f"🐢 RacePlayer loop: {CHECK_AGENTS * TICKS / player_seconds:,.0f} agent-ticks/s")
+
+    print(f"📊 Swarm throughput, {TICKS} ticks per run")
+    for agents in SWARM_SIZES:
+        spawns = make_spawns(agents, rng)
+        inputs = make_bot_inputs(agents, TICKS, rng)
+        _, seconds = run_swarm(maze, spawns, inputs)
+        print(f"{agents:>6} agents  {agents * TICKS / seconds:>14,.0f} agent-ticks/s")
+
+    pygame.quit()
+    sys.exit(1 if mismatches else 0)
@@ -0,0 +1,202 @@
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# ==========================
+# RACE SWARM
+# ==========================
+class RaceSwarm:
+    """Many race agents stepped together with NumPy, for bots and load tests.
+
+    Positions live in float arrays and every agent moves exactly like a
+    RacePlayer: one axis at a time, swept in short sub-steps up to the last
+    whole pixel before its rect (truncated as pygame.Rect does) would touch
+    a wall of the maze. Collision uses the same rules as RaceMaze.collides,
+    looked up in two boolean wall grids instead of one cell at a time, so a
+    swarm and a list of RacePlayers given the same inputs end up in the same
+    places.
+    """
+    def __init__(self, maze, x, y, radius=12, speed=6):
+        if numpy is None:
+            raise ImportError("RaceSwarm requires NumPy")
+        self.maze = maze
+        self.radius = radius
+        self.speed = speed
+        self.sweep_step = radius  # Same sub-step as RacePlayer.sweep_step
+        self.x = numpy.array(x, dtype=numpy.float64)
+        self.y = numpy.array(y, dtype=numpy.float64)
+        self.previous_x = self.x.copy()
+        self.previous_y = self.y.copy()
+        self.finished = numpy.zeros(len(self.x), dtype=bool)
+        self.finish_tick = numpy.full(len(self.x), -1, dtype=numpy.int64)
+        self.ticks = 0
+        self.build_wall_grids()
+
+    @classmethod
+    def from_players(cls, maze, players):
+        """A swarm starting where a list of RacePlayers are"""
+        first = players[0]
+        return cls(maze, [p.x for p in players], [p.y for p in players], first.radius, first.speed)
+
+    def __len__(self):
+        return len(self.x)
+
+    def build_wall_grids(self):
+        """Solid wall lines: horizontal[line_row, col] and vertical[row, line_col]"""
+        maze = self.maze
+        horizontal = numpy.array([[maze.has_horizontal_wall(line_row, col) for col in range(maze.cols)]
+                                  for line_row in range(maze.rows + 1)], dtype=bool)
+        vertical = numpy.array([[maze.has_vertical_wall(row, line_col) for line_col in range(maze.cols + 1)]
+                                for row in range(maze.rows)], dtype=bool)
+
+        # Lines and cells a rect can reach, as in RaceMaze.collides
+        extent = self.radius * 2
+        self.line_offsets = numpy.arange(extent // maze.cell_size + 1)
+        self.cell_offsets = numpy.arange(extent // maze.cell_size + 3)
+
+        # Open margin around both grids so lookups just past the maze read False
+        self.padding = len(self.cell_offsets) + 1
+        self.horizontal = numpy.pad(horizontal, self.padding)
+        self.vertical = numpy.pad(vertical, self.padding)
+
+    # ---- Input ----
+    def velocities(self, move_x, move_y):
+        """Per-agent (dx, dy) for moves of -1, 0 or 1, as RacePlayer.handle_input gives"""
+        dx = numpy.asarray(move_x, dtype=numpy.float64) * self.speed
+        dy = numpy.asarray(move_y, dtype=numpy.float64) * self.speed
+        diagonal = (dx != 0) & (dy != 0)
+        dx[diagonal] *= 0.707
+        dy[diagonal] *= 0.707
+        dx[self.finished] = 0
+        dy[self.finished] = 0
+        return dx, dy
+
+    # ---- Collision ----
+    def wall_at(self, grid, row, col):
+        """grid[row, col] per agent, False outside the maze"""
+        rows, cols = grid.shape
+        return grid[numpy.clip(row + self.padding, 0, rows - 1), numpy.clip(col + self.padding, 0, cols - 1)]
+
+    def touching_lines(self, grid, near, far, first_line, last_line, first_cell, last_cell, size):
+        """Agents with a solid line in `grid` crossing their near or far edge.
+
+        Lines run along one axis and cells along the other; a line counts when
+        its cell span contains the rect's near or far edge, the same test
+        RaceMaze.collides makes one line at a time.
+        """
+        line = (first_line[:, None] + self.line_offsets)[:, :, None]
+        cell = (first_cell[:, None] + self.cell_offsets)[:, None, :]
+        start = cell * size
+        end = start + size
+        near = near[:, None, None]
+        far = far[:, None, None]
+        touching = ((line <= last_line[:, None, None]) & (cell <= last_cell[:, None, None]) &
+                    (((start <= near) & (near <= end)) | ((start <= far) & (far <= end))))
+        return (touching & self.wall_at(grid, line, cell)).any(axis=(1, 2))
+
+    def collides(self, left, top):
+        """Which agents' rects at (left, top) touch a wall, like RaceMaze.collides"""
+        size = self.maze.cell_size
+        right = left + self.radius * 2
+        bottom = top + self.radius * 2
+
+        # Horizontal walls between each rect's top and bottom edges
+        hit = self.touching_lines(self.horizontal, left, right, -(-top // size), bottom // size,
+                                  left // size - 1, right // size, size)
+        # Vertical walls between each rect's left and right edges
+        hit |= self.touching_lines(self.vertical.T, top, bottom, -(-left // size), right // size,
+                                   top // size - 1, bottom // size, size)
+        return hit
+
+    def rect_corner(self, x, y):
+        """Top-left of each agent's rect, truncated like pygame.Rect"""
+        return (numpy.trunc(x - self.radius).astype(numpy.int64),
+                numpy.trunc(y - self.radius).astype(numpy.int64))
+
+    # ---- Simulation ----
+    def sweep(self, position, across, delta, horizontal):
+        """New positions along one axis, like RacePlayer.sweep for every agent"""
+        radius = self.radius
+        across_edge = numpy.trunc(across - radius).astype(numpy.int64)
+
+        def blocked(edge, agents=slice(None)):
+            if horizontal:
+                return self.collides(edge, across_edge[agents])
+            return self.collides(across_edge[agents], edge)
+
+        def edge_of(values):
+            return numpy.trunc(values - radius).astype(numpy.int64)
+
+        steps = numpy.ceil(numpy.abs(delta) / self.sweep_step).astype(numpy.int64)
+        moving = (steps > 0) & ~self.finished
+        divisor = numpy.maximum(steps, 1)
+        end = numpy.where(moving, position + delta, position)
+
+        # Sub-steps until each agent's first blocked one
+        previous = position.copy()
+        blocked_at = position.copy()
+        hit = numpy.zeros(len(position), dtype=bool)
+        for step in range(1, int(steps.max(initial=0)) + 1):
+            stepping = moving & ~hit & (step <= steps)
+            if not stepping.any():
+                break
+            candidate = position + delta * step / divisor
+            now_blocked = stepping & blocked(edge_of(candidate))
+            blocked_at = numpy.where(now_blocked, candidate, blocked_at)
+            previous = numpy.where(stepping & ~now_blocked, candidate, previous)
+            hit |= now_blocked
+
+        # Only the agents that met a wall need the rest
+        agents = numpy.flatnonzero(hit)
+        if len(agents) == 0:
+            return end
+        start = position[agents]
+        previous = previous[agents]
+        free = edge_of(previous)
+
+        # Agents blocked on their first sub-step may already be touching a wall
+        stuck = (previous == start) & blocked(free, agents)
+
+        # Bisect to the last free whole pixel before the wall
+        wall = edge_of(blocked_at[agents])
+        while True:
+            narrowing = ~stuck & (numpy.abs(wall - free) > 1)
+            if not narrowing.any():
+                break
+            middle = free + (wall - free) // 2
+            middle_blocked = blocked(middle, agents)
+            wall = numpy.where(narrowing & middle_blocked, middle, wall)
+            free = numpy.where(narrowing & ~middle_blocked, middle, free)
+
+        contact = free + radius
+        contact = numpy.where(delta[agents] > 0, numpy.maximum(start, contact), numpy.minimum(start, contact))
+        end[agents] = numpy.where(stuck, start, contact)
+        return end
+
+    def step(self, dx, dy):
+        """Advance every agent by one simulation tick, like RacePlayer.move"""
+        self.previous_x = self.x.copy()
+        self.previous_y = self.y.copy()
+
+        # Slide: sweep horizontally, then vertically from wherever that stopped
+        self.x = self.sweep(self.x, self.y, dx, True)
+        self.y = self.sweep(self.y, self.x, dy, False)
+
+        self.ticks += 1
+
+    def check_finish(self, finish_rect):
+        """Mark the agents whose rects overlap a pygame.Rect and return their indices"""
+        left, top = self.rect_corner(self.x, self.y)
+        size = self.radius * 2
+        inside = ((left < finish_rect.right) & (finish_rect.left < left + size) &
+                  (top < finish_rect.bottom) & (finish_rect.top < top + size))
+        arrived = numpy.flatnonzero(inside & ~self.finished)
+        self.finished[arrived] = True
+        self.finish_tick[arrived] = self.ticks
+        return arrived
+
+    def get_draw_positions(self, alpha=1.0):
+        """Positions `alpha` of the way from the previous tick to the current one"""
+        return (self.previous_x + (self.x - self.previous_x) * alpha,
+                self.previous_y + (self.y - self.previous_y) * alpha)
@@ -0,0 +1,105 @@
+import random
+import pygame
+
+from level import Level, TILE_SIZE, TILE_WALL, TILE_END
+from chunks import ChunkRenderer
+
+BACKGROUND = (20, 30, 40)
+
+def tile_images():
+    wall = pygame.Surface((TILE_SIZE, TILE_SIZE))
+    wall.fill((120, 120, 120))
+    end = pygame.Surface((TILE_SIZE, TILE_SIZE))
+    end.fill((0, 200, 0))
+    return {TILE_WALL: wall, TILE_END: end}
+
+def random_level(rows, cols, seed):
+    rng = random.Random(seed)
+    level = Level(rows, cols)
+    for row in range(rows):
+        for col in range(cols):
+            level.set_tile(row, col, rng.choice((0, 0, TILE_WALL, TILE_END)))
+    return level
+
+def draw_tiles(surface, level, images, camera_x, camera_y):
+    """One blit per tile, as the level was drawn before chunks"""
+    surface.fill(BACKGROUND)
+    for row in range(level.rows):
+        for col in range(level.cols):
+            image = images.get(level.get_tile(row, col))
+            if image is not None:
+                surface.blit(image, (col * TILE_SIZE - camera_x, row * TILE_SIZE - camera_y))
+
+def draw_chunks(surface, chunks, camera_x, camera_y):
+    surface.fill(BACKGROUND)
+    chunks.draw(surface, camera_x, camera_y)
+
+def pixels(surface):
+    return pygame.image.tobytes(surface, "RGB")
+
+# ---- Baked chunks ----
+def test_chunks_draw_the_same_as_single_tiles():
+    level = random_level(19, 27, 1)
+    images = tile_images()
+    chunks = ChunkRenderer(level, images, chunk_tiles=4)
+    expected = pygame.Surface((300, 200))
+    drawn = pygame.Surface((300, 200))
+    for camera_x, camera_y in ((0, 0), (37, 91), (-60, -45), (1100, 780), (733, 512)):
+        draw_tiles(expected, level, images, camera_x, camera_y)
+        draw_chunks(drawn, chunks, camera_x, camera_y)
+        assert pixels(drawn) == pixels(expected), (camera_x, camera_y)
+
+def test_chunks_are_baked_once():
+    level = random_level(16, 16, 2)
+    chunks = ChunkRenderer(level, tile_images(), chunk_tiles=8)
+    surface = pygame.Surface((400, 400))
+    chunks.draw(surface, 0, 0)
+    chunks.draw(surface, 0, 0)
+    assert chunks.misses == 1 and chunks.hits == 1
+
+# ---- Dirty tracking and budget ----
+def test_mark_dirty_rebakes_only_the_touched_chunk():
+    level = random_level(16, 16, 3)
+    images = tile_images()
+    chunks = ChunkRenderer(level, images, chunk_tiles=4)
+    surface = pygame.Surface((800, 800))
+    chunks.draw(surface, 0, 0)
+    chunks.draw(surface, 0, 0, 0.5)
+    baked = {key: entry[0] for key, entry in chunks.chunks.items()}
+
+    level.set_tile(5, 9, TILE_WALL if level.get_tile(5, 9) != TILE_WALL else 0)
+    chunks.mark_dirty(5, 9)
+    assert set(baked) - set(chunks.chunks) == {(2, 1, 1.0), (2, 1, 0.5)}
+
+    misses = chunks.misses
+    draw_chunks(surface, chunks, 0, 0)
+    assert chunks.misses == misses + 1
+    for key, entry in chunks.chunks.items():
+        if key != (2, 1, 1.0) and key in baked:
+            assert entry[0] is baked[key], key
+
+    expected = pygame.Surface((800, 800))
+    draw_tiles(expected, level, images, 0, 0)
+    assert pixels(surface) == pixels(expected)
+
+def test_eviction_keeps_the_pixel_budget():
+    level = random_level(40, 40, 4)
+    # A 300x300 view needs up to nine chunks at once, which are never evicted
+    chunks = ChunkRenderer(level, tile_images(), chunk_tiles=4, max_chunks=12)
+    budget = 12 * chunks.chunk_size * chunks.chunk_size
+    surface = pygame.Surface((300, 300))
+    rng = random.Random(4)
+    for _ in range(100):
+        chunks.draw(surface, rng.randrange(0, 1700), rng.randrange(0, 1700), rng.choice((1.0, 0.5)))
+        assert chunks.pixels <= budget
+        assert chunks.pixels == sum(entry[0].get_width() * entry[0].get_height()
+                                    for entry in chunks.chunks.values())
+    assert chunks.evictions > 0
+
+def test_chunks_on_screen_are_never_evicted():
+    level = random_level(40, 40, 5)
+    chunks = ChunkRenderer(level, tile_images(), chunk_tiles=4, max_chunks=2)
+    # A view four chunks wide and tall needs all sixteen at once
+    chunks.draw(pygame.Surface((800, 800)), 0, 0)
+    assert len(chunks.chunks) == 16
+    assert all(frame == chunks.frame for _, frame in chunks.chunks.values())
@@ -0,0 +1,107 @@
+import random
+import pygame
+
+from level import Level, TILE_WALL, TILE_START, TILE_END, TILE_FLASHLIGHT, DEFAULT_START_POS
+from engine import LevelSim, RaceSim, HeldKeys, NO_KEYS, BASE_LIGHT_RADIUS, FLASHLIGHT_LIGHT_BONUS
+from race import RacePlayer
+
+def make_corridor(start=True, flashlight=True):
+    """A 3-tile-high corridor walled all round: start on the left, exit on the right"""
+    rows, cols = 5, 14
+    level = Level(rows, cols)
+    for row in range(rows):
+        for col in range(cols):
+            if row in (0, rows - 1) or col in (0, cols - 1):
+                level.set_tile(row, col, TILE_WALL)
+    if start:
+        level.set_tile(2, 1, TILE_START)
+    if flashlight:
+        level.set_tile(2, 6, TILE_FLASHLIGHT)
+    level.set_tile(2, 12, TILE_END)
+    level.find_special_tiles()
+    return level
+
+def random_inputs(ticks, seed):
+    rng = random.Random(seed)
+    choices = [NO_KEYS, HeldKeys(pygame.K_d), HeldKeys(pygame.K_a), HeldKeys(pygame.K_s),
+               HeldKeys(pygame.K_w), HeldKeys(pygame.K_d, pygame.K_s), HeldKeys(pygame.K_a, pygame.K_w)]
+    inputs = []
+    keys = NO_KEYS
+    for _ in range(ticks):
+        if rng.random() < 0.1:
+            keys = rng.choice(choices)
+        inputs.append(keys)
+    return inputs
+
+def test_walking_right_reaches_the_exit():
+    sim = LevelSim(make_corridor())
+    sim.run([HeldKeys(pygame.K_d)] * 600)
+
+    assert sim.won
+    assert sim.player.collision_rect.colliderect(sim.end_rect)
+    assert sim.elapsed == sim.ticks / sim.tick_rate
+
+def test_flashlight_on_the_way_widens_the_light():
+    sim = LevelSim(make_corridor())
+    sim.run([HeldKeys(pygame.K_d)] * 600)
+
+    assert sim.flashlights_collected == 1
+    assert sim.light_radius == BASE_LIGHT_RADIUS + FLASHLIGHT_LIGHT_BONUS
+    assert not sim.flashlights.active
+
+def test_walls_stop_the_player():
+    sim = LevelSim(make_corridor())
+    sim.run([HeldKeys(pygame.K_w)] * 120)
+
+    # The top wall's bottom edge is at y = 50
+    assert sim.player.collision_rect.top >= 50
+    assert not sim.won
+
+def test_steps_stop_once_won():
+    sim = LevelSim(make_corridor())
+    sim.run([HeldKeys(pygame.K_d)] * 600)
+    ticks = sim.ticks
+
+    assert sim.step(HeldKeys(pygame.K_d)) == []
+    assert sim.ticks == ticks
+
+def test_level_without_start_tile_uses_default_start():
+    level = make_corridor(start=False)
+    assert level.start_pos is None
+
+    sim = LevelSim(level)
+    assert sim.player.rect.center == DEFAULT_START_POS
+    sim.step(NO_KEYS)
+
+def test_level_without_start_tile_loads_like_the_game(tmp_path):
+    make_corridor(start=False).save(tmp_path / "no_start.json")
+
+    sim = LevelSim.load("no_start", str(tmp_path))
+    assert sim.level.start_pos == DEFAULT_START_POS
+    assert sim.player.rect.center == DEFAULT_START_POS
+
+def test_level_runs_are_deterministic():
+    inputs = random_inputs(900, seed=3)
+    first = LevelSim.load("level1").run(inputs)
+    second = LevelSim.load("level1").run(inputs)
+
+    assert first.state() == second.state()
+    assert first.ticks > 0
+
+def race_players():
+    p1 = RacePlayer(20, 20, (100, 200, 255), {'up': pygame.K_w, 'down': pygame.K_s,
+                                              'left': pygame.K_a, 'right': pygame.K_d}, "Player 1")
+    p2 = RacePlayer(580, 20, (255, 100, 200), {'up': pygame.K_UP, 'down': pygame.K_DOWN,
+                                               'left': pygame.K_LEFT, 'right': pygame.K_RIGHT}, "Player 2")
+    return [p1, p2]
+
+def test_race_runs_are_deterministic():
+    rng = random.Random(5)
+    keys = [pygame.K_w, pygame.K_a, pygame.K_s, pygame.K_d, pygame.K_UP, pygame.K_DOWN, pygame.K_LEFT, pygame.K_RIGHT]
+    inputs = [HeldKeys(*rng.sample(keys, 3)) for _ in range(600)]
+
+    first = RaceSim.new(race_players(), 15, 10, seed=7).run(inputs)
+    second = RaceSim.new(race_players(), 15, 10, seed=7).run(inputs)
+
+    assert first.state() == second.state()
+    assert [p.x for p in first.players] != [20, 580]
@@ -0,0 +1,32 @@
+from fonts import MAX_TEXTS, TextCache
+
+WHITE = (255, 255, 255)
+
+def test_same_text_is_rendered_once():
+    cache = TextCache()
+    first = cache.render("Level 1", 36, WHITE)
+    assert cache.render("Level 1", 36, [255, 255, 255]) is first
+    assert cache.render("Level 1", 48, WHITE) is not first
+    assert (cache.hits, cache.misses) == (1, 2)
+    assert cache.font(36) is cache.font(36)
+
+def test_oldest_text_is_evicted_at_max_texts():
+    cache = TextCache()
+    for i in range(MAX_TEXTS):
+        cache.render(str(i), 24, WHITE)
+    assert len(cache.texts) == MAX_TEXTS and cache.evictions == 0
+
+    # Using "0" again makes "1" the least recently used
+    kept = cache.render("0", 24, WHITE)
+    cache.render("new", 24, WHITE)
+    assert len(cache.texts) == MAX_TEXTS
+    assert cache.evictions == 1
+    assert ("1", 24, WHITE) not in cache.texts
+    assert cache.render("0", 24, WHITE) is kept
+
+def test_small_cache_keeps_only_the_latest_texts():
+    cache = TextCache(max_texts=3)
+    for text in "abcdef":
+        cache.render(text, 24, WHITE)
+    assert [key[0] for key in cache.texts] == ["d", "e", "f"]
+    assert cache.stats()["evictions"] == 3
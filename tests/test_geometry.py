@@ -0,0 +1,83 @@
+import glob
+import random
+
+from level import Level, TILE_SIZE, TILE_WALL
+from geometry import LevelGeometry, find_wall_edges, find_wall_rects
+from lighting import compute_visibility_polygon
+
+def level_files():
+    return sorted(glob.glob("levels/*.json"))
+
+def random_level(rows, cols, seed, density=0.4):
+    rng = random.Random(seed)
+    level = Level(rows, cols)
+    for row in range(rows):
+        for col in range(cols):
+            if rng.random() < density:
+                level.set_tile(row, col, TILE_WALL)
+    return level
+
+def covered_tiles(rects):
+    """(row, col) of every tile under each rect, counting tiles covered twice"""
+    tiles = []
+    for rect in rects:
+        assert rect.left % TILE_SIZE == 0 and rect.top % TILE_SIZE == 0, rect
+        assert rect.width % TILE_SIZE == 0 and rect.height % TILE_SIZE == 0, rect
+        for row in range(rect.top // TILE_SIZE, rect.bottom // TILE_SIZE):
+            for col in range(rect.left // TILE_SIZE, rect.right // TILE_SIZE):
+                tiles.append((row, col))
+    return tiles
+
+def check_wall_rects(level):
+    tiles = covered_tiles(find_wall_rects(level, level.rows, level.cols))
+    assert len(tiles) == len(set(tiles)), "rects overlap"
+    assert set(tiles) == set(level.positions_of(TILE_WALL))
+
+def test_wall_rects_cover_exactly_the_wall_tiles():
+    for filepath in level_files():
+        check_wall_rects(Level.load(filepath))
+    for seed in range(20):
+        check_wall_rects(random_level(17, 23, seed))
+
+def test_wall_rects_merge_a_solid_block():
+    level = Level(6, 8)
+    for row in range(1, 4):
+        for col in range(2, 7):
+            level.set_tile(row, col, TILE_WALL)
+    rects = find_wall_rects(level, level.rows, level.cols)
+    assert [tuple(rect) for rect in rects] == [(2 * TILE_SIZE, TILE_SIZE, 5 * TILE_SIZE, 3 * TILE_SIZE)]
+
+def test_level_without_walls_has_no_rects():
+    assert find_wall_rects(Level(4, 4), 4, 4) == []
+
+def distance_sq_to_segment(x, y, segment):
+    x1, y1, x2, y2 = segment
+    closest_x = min(max(x, min(x1, x2)), max(x1, x2))
+    closest_y = min(max(y, min(y1, y2)), max(y1, y2))
+    return (closest_x - x) ** 2 + (closest_y - y) ** 2
+
+def test_segments_near_matches_scanning_every_edge():
+    level = Level.load("levels/level6.json")
+    geometry = LevelGeometry(level, level.rows, level.cols)
+    edges = find_wall_edges(level, level.rows, level.cols)
+    rng = random.Random(6)
+    for _ in range(300):
+        x = rng.uniform(-100, level.cols * TILE_SIZE + 100)
+        y = rng.uniform(-100, level.rows * TILE_SIZE + 100)
+        radius = rng.choice((80, 140, 200, 500))
+        expected = [edge for edge in edges if distance_sq_to_segment(x, y, edge) <= radius * radius]
+        assert sorted(geometry.segments_near(x, y, radius)) == sorted(expected), (x, y, radius)
+
+def test_light_polygons_are_the_same_with_level_geometry():
+    level = Level.load("levels/level6.json")
+    geometry = LevelGeometry(level, level.rows, level.cols)
+    open_tiles = [divmod(index, level.cols) for index, tile in enumerate(level.tiles) if tile != TILE_WALL]
+    rng = random.Random(7)
+    for _ in range(200):
+        row, col = rng.choice(open_tiles)
+        x = col * TILE_SIZE + rng.uniform(1, TILE_SIZE - 1)
+        y = row * TILE_SIZE + rng.uniform(1, TILE_SIZE - 1)
+        radius = rng.choice((80, 140, 200))
+        scanned = compute_visibility_polygon(x, y, radius, level, level.rows, level.cols)
+        indexed = compute_visibility_polygon(x, y, radius, level, level.rows, level.cols, geometry=geometry)
+        assert indexed == scanned, (x, y, radius)
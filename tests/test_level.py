@@ -0,0 +1,61 @@
+import glob
+import json
+import random
+
+from level import Level, TILE_SIZE, TILE_EMPTY, TILE_WALL, TILE_START, TILE_END, TILE_FLASHLIGHT
+
+def random_grid(rows, cols, seed):
+    rng = random.Random(seed)
+    tiles = (TILE_EMPTY, TILE_WALL, TILE_START, TILE_END, TILE_FLASHLIGHT)
+    return [[rng.choice(tiles) for _ in range(cols)] for _ in range(rows)]
+
+def test_from_grid_round_trips_through_to_grid():
+    grid = random_grid(9, 13, 1)
+    level = Level.from_grid(grid, 9, 13)
+    assert level.to_grid() == grid
+    for row in range(9):
+        for col in range(13):
+            assert level.get_tile(row, col) == grid[row][col]
+
+def test_save_and_load_round_trip(tmp_path):
+    level = Level.from_grid(random_grid(7, 11, 2), 7, 11, name="Round trip")
+    filepath = tmp_path / "level.json"
+    level.save(filepath)
+
+    loaded = Level.load(filepath)
+    assert (loaded.rows, loaded.cols, loaded.name) == (7, 11, "Round trip")
+    assert loaded.tiles == level.tiles
+    assert loaded.start_pos == level.start_pos
+    assert loaded.end_pos == level.end_pos
+    assert loaded.flashlight_positions == level.flashlight_positions
+
+def test_shipped_levels_load_like_their_files():
+    for filepath in sorted(glob.glob("levels/*.json")):
+        with open(filepath) as f:
+            data = json.load(f)
+        level = Level.load(filepath)
+        assert level.to_grid() == data["grid"], filepath
+
+def test_short_grid_rows_are_padded_with_empty_tiles():
+    level = Level.from_grid([[TILE_WALL], [TILE_WALL, TILE_WALL, TILE_WALL]], 3, 3)
+    assert level.to_grid() == [[TILE_WALL, 0, 0], [TILE_WALL, TILE_WALL, TILE_WALL], [0, 0, 0]]
+
+def test_special_tiles_are_tile_centres():
+    level = Level(4, 5)
+    level.set_tile(1, 2, TILE_START)
+    level.set_tile(3, 4, TILE_END)
+    level.set_tile(0, 1, TILE_FLASHLIGHT)
+    level.set_tile(2, 0, TILE_FLASHLIGHT)
+    level.find_special_tiles()
+    half = TILE_SIZE // 2
+    assert level.start_pos == (2 * TILE_SIZE + half, TILE_SIZE + half)
+    assert level.end_pos == (4 * TILE_SIZE + half, 3 * TILE_SIZE + half)
+    assert level.flashlight_positions == [(TILE_SIZE + half, half), (half, 2 * TILE_SIZE + half)]
+
+def test_tiles_outside_the_level_are_walls():
+    level = Level(2, 2)
+    level.set_tile(0, 1, TILE_WALL)
+    assert level.is_wall(0, 1)
+    assert not level.is_wall(1, 1)
+    for row, col in ((-1, 0), (0, -1), (2, 0), (0, 2)):
+        assert level.is_wall(row, col)
@@ -0,0 +1,183 @@
+import math
+import random
+import pygame
+import pytest
+
+from level import Level, TILE_SIZE, TILE_WALL
+from lighting import (ARC_TOLERANCE, DARKNESS_ALPHA, QUALITY_TIERS, LightAccumulator, LightCompositor, NumpyLightCompositor, RaceLighting, cast_ray,
+                      build_light_stamp, compute_visibility_polygon, compute_segment_visibility_polygon,
+                      get_segment_corners)
+from race import generate_race_maze
+
+MARCH_STEP = 0.05  # Reference ray step in pixels
+
+def march_ray(start_x, start_y, angle, max_distance, grid, rows, cols, step=MARCH_STEP):
+    """The original fixed-step ray march, at a much finer step"""
+    dx = math.cos(angle)
+    dy = math.sin(angle)
+    for i in range(int(max_distance / step)):
+        distance = i * step
+        grid_x = int((start_x + dx * distance) // TILE_SIZE)
+        grid_y = int((start_y + dy * distance) // TILE_SIZE)
+        if grid_x < 0 or grid_x >= cols or grid_y < 0 or grid_y >= rows:
+            return distance
+        if grid.tiles[grid_y * cols + grid_x] == TILE_WALL:
+            return distance
+    return max_distance
+
+def random_rays(level, count, seed):
+    rng = random.Random(seed)
+    open_tiles = [divmod(index, level.cols) for index, tile in enumerate(level.tiles) if tile != TILE_WALL]
+    for _ in range(count):
+        row, col = rng.choice(open_tiles)
+        x = col * TILE_SIZE + rng.uniform(0.5, TILE_SIZE - 0.5)
+        y = row * TILE_SIZE + rng.uniform(0.5, TILE_SIZE - 0.5)
+        yield x, y, rng.uniform(0, 2 * math.pi)
+
+def test_dda_matches_ray_marching():
+    level = Level.load("levels/level6.json")
+    for x, y, angle in random_rays(level, 300, seed=1):
+        hit = march_ray(x, y, angle, 500, level, level.rows, level.cols)
+        for radius in (80, 200, 500):
+            expected = min(hit, radius)
+            distance = cast_ray(x, y, angle, radius, level, level.rows, level.cols)
+            assert expected - MARCH_STEP <= distance <= expected + 1e-9, (x, y, angle, radius)
+
+def test_axis_aligned_rays_stop_at_the_wall_face():
+    level = Level(3, 5)
+    level.set_tile(1, 4, TILE_WALL)
+    # From the middle of tile (1, 1) straight right, the wall starts at x = 200
+    assert cast_ray(75, 75, 0.0, 500, level, 3, 5) == 125
+    # Straight left leaves the level at x = 0
+    assert cast_ray(75, 75, math.pi, 500, level, 3, 5) == 75
+    # Nothing within reach
+    assert cast_ray(75, 75, 0.0, 100, level, 3, 5) == 100
+
+def test_ray_starting_in_a_wall_is_blocked():
+    level = Level(3, 3)
+    level.set_tile(1, 1, TILE_WALL)
+    assert cast_ray(75, 75, 1.0, 200, level, 3, 3) == 0
+
+def point_in_polygon(px, py, points):
+    """Even-odd rule"""
+    inside = False
+    previous_x, previous_y = points[-1]
+    for x, y in points:
+        if (y > py) != (previous_y > py) and px < (previous_x - x) * (py - y) / (previous_y - y) + x:
+            inside = not inside
+        previous_x, previous_y = x, y
+    return inside
+
+def test_light_polygon_holds_exactly_the_points_rays_reach():
+    level = Level.load("levels/level6.json")
+    rng = random.Random(2)
+    for x, y, _ in random_rays(level, 60, seed=2):
+        radius = rng.choice((80, 140, 200))
+        polygon = compute_visibility_polygon(x, y, radius, level, level.rows, level.cols)
+        for _ in range(100):
+            angle = rng.uniform(0, 2 * math.pi)
+            distance = rng.uniform(1, radius)
+            # Chords between arc rays may cut up to ARC_TOLERANCE inside the circle
+            if distance > radius - ARC_TOLERANCE - 0.5:
+                continue
+            reach = cast_ray(x, y, angle, radius, level, level.rows, level.cols)
+            if abs(reach - distance) < 1:
+                continue
+            inside = point_in_polygon(x + math.cos(angle) * distance, y + math.sin(angle) * distance, polygon)
+            assert inside == (distance < reach), (x, y, radius, angle, distance)
+
+def test_race_light_polygons_match_scanning_every_wall():
+    rng = random.Random(3)
+    maze = generate_race_maze(30, 18, 40, rng)
+    walls = maze.wall_lines
+    corners = get_segment_corners(walls)
+    lighting = RaceLighting(1200, 720)
+    lighting.set_walls(walls)
+    for i in range(150):
+        x = rng.uniform(0, 1200)
+        y = rng.uniform(0, 720)
+        radius = rng.choice((60, 120, 200))
+        expected = compute_segment_visibility_polygon(x, y, radius, walls, corners)
+        assert lighting.get_polygon(i, x, y, radius) == expected, (x, y, radius)
+
+@pytest.mark.parametrize("scale", [1, 0.5])
+def test_numpy_compositor_matches_pygame(scale):
+    pytest.importorskip("numpy")
+    level = Level.load("levels/level6.json")
+    compositors = [LightCompositor(1200, 800, scale=scale), NumpyLightCompositor(1200, 800, scale=scale)]
+    # Overlapping lights, one partly off screen, over two frames so begin() resets the first
+    frames = [[(425, 375, 150), (525, 425, 80), (75, 75, 200)], [(675, 225, 140)]]
+    for lights in frames:
+        for compositor in compositors:
+            compositor.begin()
+            for x, y, radius in lights:
+                polygon = compute_visibility_polygon(x, y, radius, level, level.rows, level.cols)
+                compositor.add_light(polygon, x, y, radius)
+        alphas = [pygame.image.tobytes(compositor.get_output(), "RGBA") for compositor in compositors]
+        assert alphas[0] == alphas[1], lights
+
+def circle_polygon(x, y, radius, count=720):
+    """A light with no walls in reach: a polygon just outside its circle"""
+    angles = [i * 2 * math.pi / count for i in range(count)]
+    return [(x + math.cos(angle) * (radius + 2), y + math.sin(angle) * (radius + 2)) for angle in angles]
+
+def test_light_stamp_fades_out_to_its_radius():
+    radius = 60
+    stamp = pygame.surfarray.array_alpha(build_light_stamp(radius))
+    row = [int(value) for value in stamp[radius:, radius]]
+    assert row[0] == DARKNESS_ALPHA
+    assert row == sorted(row, reverse=True)
+    assert row[-1] == 0 and stamp[0, 0] == 0
+
+def test_open_light_removes_its_stamp_from_the_darkness():
+    radius = 60
+    compositor = LightCompositor(300, 200)
+    compositor.begin()
+    compositor.add_light(circle_polygon(150, 100, radius), 150, 100, radius)
+    darkness = pygame.surfarray.array_alpha(compositor.get_output())
+    stamp = pygame.surfarray.array_alpha(build_light_stamp(radius))
+    for x in range(90, 211, 7):
+        for y in range(40, 161, 7):
+            assert darkness[x, y] == DARKNESS_ALPHA - stamp[x - 90, y - 40], (x, y)
+    assert darkness[0, 0] == DARKNESS_ALPHA
+
+def test_begin_restores_darkness_where_the_last_frame_was_lit():
+    moved = LightCompositor(300, 200)
+    for x in (80, 200):
+        moved.begin()
+        moved.add_light(circle_polygon(x, 100, 50), x, 100, 50)
+    fresh = LightCompositor(300, 200)
+    fresh.begin()
+    fresh.add_light(circle_polygon(200, 100, 50), 200, 100, 50)
+    assert pygame.image.tobytes(moved.get_output(), "RGBA") == pygame.image.tobytes(fresh.get_output(), "RGBA")
+
+def test_overlay_is_reused_until_lights_or_camera_move():
+    level = Level.load("levels/level6.json")
+    accumulator = LightAccumulator(600, 400)
+    lights = [(425, 375, 150)]
+    first = accumulator.get_lights_overlay(lights, 100, 100, level, level.rows, level.cols)
+    before = pygame.image.tobytes(first, "RGBA")
+    second = accumulator.get_lights_overlay(lights, 100, 100, level, level.rows, level.cols)
+    assert second is first and pygame.image.tobytes(second, "RGBA") == before
+    assert (accumulator.hits, accumulator.misses) == (1, 1)
+
+    accumulator.get_lights_overlay(lights, 110, 100, level, level.rows, level.cols)
+    accumulator.get_lights_overlay([(425, 375, 140)], 110, 100, level, level.rows, level.cols)
+    assert (accumulator.hits, accumulator.misses) == (1, 3)
+
+@pytest.mark.parametrize("quality", QUALITY_TIERS, ids=[tier["name"] for tier in QUALITY_TIERS])
+def test_accumulator_draws_every_light_in_view(quality):
+    level = Level.load("levels/level6.json")
+    accumulator = LightAccumulator(600, 400, quality=quality)
+    camera_x, camera_y = 300, 200
+    # Two in view, one reaching in from outside, two too far away to matter
+    lights = [(425, 375, 150), (675, 225, 140), (275, 125, 80), (75, 75, 80), (1175, 775, 120)]
+    overlay = accumulator.get_lights_overlay(lights, camera_x, camera_y, level, level.rows, level.cols)
+    assert (accumulator.visible_lights, accumulator.total_lights) == (3, 5)
+
+    expected = LightCompositor(600, 400, DARKNESS_ALPHA, quality["scale"], quality["layers"])
+    expected.begin()
+    for x, y, radius in lights[:3]:
+        polygon = compute_visibility_polygon(x, y, radius, level, level.rows, level.cols, quality["arc_tolerance"])
+        expected.add_light([(px - camera_x, py - camera_y) for px, py in polygon], x - camera_x, y - camera_y, radius)
+    assert pygame.image.tobytes(overlay, "RGBA") == pygame.image.tobytes(expected.get_output(), "RGBA")
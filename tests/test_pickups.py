@@ -0,0 +1,74 @@
+import math
+import random
+import pygame
+
+from level import TILE_SIZE
+from pickups import PULSE_FRAMES, Flashlight, PickupIndex, get_flashlight_image
+
+def random_flashlights(count, seed):
+    """Flashlights anywhere, so plenty of them straddle tile lines"""
+    rng = random.Random(seed)
+    return [Flashlight(rng.randrange(0, 3000), rng.randrange(0, 2000)) for _ in range(count)]
+
+def random_rect(rng):
+    return pygame.Rect(rng.randrange(-100, 3100), rng.randrange(-100, 2100), rng.randrange(1, 120), rng.randrange(1, 120))
+
+def test_collect_matches_a_linear_scan():
+    rng = random.Random(4)
+    pickups = random_flashlights(300, 4)
+    scanned = random_flashlights(300, 4)
+    index = PickupIndex(pickups)
+
+    for _ in range(2000):
+        rect = random_rect(rng)
+        expected = [i for i, pickup in enumerate(scanned) if pickup.check_collection(rect)]
+        collected = index.collect(rect)
+        assert [pickups.index(pickup) for pickup in collected] == expected, rect
+
+    assert index.active == [pickup for pickup in pickups if not pickup.collected]
+
+def test_in_view_holds_every_pickup_the_view_can_see():
+    rng = random.Random(5)
+    pickups = random_flashlights(300, 5)
+    index = PickupIndex(pickups)
+    for _ in range(200):
+        index.collect(random_rect(rng))
+
+    for _ in range(300):
+        camera_x = rng.randrange(-600, 3000)
+        camera_y = rng.randrange(-400, 2000)
+        in_view = index.in_view(camera_x, camera_y, 1200, 800)
+
+        # Everything drawn near the view is there, collected pickups aren't, in level order
+        view = pygame.Rect(camera_x, camera_y, 1200, 800).inflate(TILE_SIZE * 2, TILE_SIZE * 2)
+        visible = [pickup for pickup in pickups if not pickup.collected and pickup.rect.colliderect(view)]
+        assert set(map(id, visible)) <= set(map(id, in_view))
+        assert all(not pickup.collected for pickup in in_view)
+        assert in_view == sorted(in_view, key=pickups.index)
+
+def test_zero_size_rect_collects_nothing():
+    index = PickupIndex([Flashlight(25, 25)])
+    assert index.collect(pygame.Rect(25, 25, 0, 0)) == []
+
+def draw_pulse(surface, flashlight, camera_x, camera_y):
+    """The flashlight as it was drawn before the atlas, scaling and building the glow every frame"""
+    pulse = math.sin(flashlight.pulse_offset)
+    scaled_size = int(TILE_SIZE * (1.0 + pulse * 0.1))
+    scaled_img = pygame.transform.scale(get_flashlight_image(), (scaled_size, scaled_size))
+    surface.blit(scaled_img, (flashlight.x - camera_x - scaled_size // 2, flashlight.y - camera_y - scaled_size // 2))
+    glow_radius = int(30 + pulse * 5)
+    glow = pygame.Surface((glow_radius * 2, glow_radius * 2), pygame.SRCALPHA)
+    pygame.draw.circle(glow, (255, 255, 0, 50), (glow_radius, glow_radius), glow_radius)
+    surface.blit(glow, (flashlight.x - camera_x - glow_radius, flashlight.y - camera_y - glow_radius))
+
+def test_pulse_atlas_draws_like_scaling_every_frame():
+    flashlight = Flashlight(60, 60)
+    expected = pygame.Surface((120, 120))
+    drawn = pygame.Surface((120, 120))
+    for frame in range(PULSE_FRAMES):
+        flashlight.pulse_offset = frame * 2 * math.pi / PULSE_FRAMES
+        expected.fill((30, 30, 30))
+        drawn.fill((30, 30, 30))
+        draw_pulse(expected, flashlight, 0, 0)
+        flashlight.draw(drawn, 0, 0)
+        assert pygame.image.tobytes(drawn, "RGB") == pygame.image.tobytes(expected, "RGB"), frame
@@ -0,0 +1,89 @@
+import random
+import pygame
+import pytest
+
+from race import generate_race_maze
+from race_benchmark import BOT_CONTROLS, make_bot_inputs
+
+def segments_intersect(x1, y1, x2, y2, x3, y3, x4, y4):
+    """The original segment test: parallel segments never intersect"""
+    denom = (x1 - x2) * (y3 - y4) - (y1 - y2) * (x3 - x4)
+    if denom == 0:
+        return False
+    t = ((x1 - x3) * (y3 - y4) - (y1 - y3) * (x3 - x4)) / denom
+    u = -((x1 - x2) * (y1 - y3) - (y1 - y2) * (x1 - x3)) / denom
+    return 0 <= t <= 1 and 0 <= u <= 1
+
+def reference_collides(maze, rect):
+    """Every wall line against every edge of the rect, as before the bitmask maze"""
+    edges = [
+        (rect.left, rect.top, rect.right, rect.top),
+        (rect.left, rect.bottom, rect.right, rect.bottom),
+        (rect.left, rect.top, rect.left, rect.bottom),
+        (rect.right, rect.top, rect.right, rect.bottom)
+    ]
+    return any(segments_intersect(*line, *edge) for line in maze.wall_lines for edge in edges)
+
+def test_collides_matches_segment_intersection():
+    maze = generate_race_maze(12, 8, 40, random.Random(2))
+    rng = random.Random(4)
+    hits = 0
+    for _ in range(2000):
+        size = rng.choice((8, 24, 39, 40, 41, 90))
+        rect = pygame.Rect(rng.randrange(-30, 12 * 40 + 10), rng.randrange(-30, 8 * 40 + 10), size, size)
+        expected = reference_collides(maze, rect)
+        assert maze.collides(rect) == expected, rect
+        hits += expected
+    assert 0 < hits < 2000
+
+def test_rects_on_cell_corners_match():
+    # Edges lying exactly on wall lines and corners are where the shortcuts could differ
+    maze = generate_race_maze(6, 5, 40, random.Random(9))
+    for top in range(-4, 5 * 40 + 4, 4):
+        for left in range(-4, 6 * 40 + 4, 4):
+            rect = pygame.Rect(left, top, 24, 24)
+            assert maze.collides(rect) == reference_collides(maze, rect), rect
+
+def test_same_seed_gives_the_same_maze():
+    first = generate_race_maze(30, 20, 40, random.Random(11))
+    second = generate_race_maze(30, 20, 40, random.Random(11))
+    assert first.cells == second.cells
+
+# ---- Race swarm ----
+def run_race(speed, agents=20, ticks=200, seed=1):
+    """The same bots stepped as RacePlayers and as one RaceSwarm"""
+    numpy = pytest.importorskip("numpy")
+    from race import RacePlayer
+    from race_swarm import RaceSwarm
+
+    maze = generate_race_maze(15, 10, 40, random.Random(seed))
+    rng = random.Random(seed)
+    spawns = [((rng.randrange(15) + 0.5) * 40, (rng.randrange(10) + 0.5) * 40) for _ in range(agents)]
+    moves = make_bot_inputs(agents, ticks, rng)
+
+    players = [RacePlayer(x, y, (255, 255, 255), BOT_CONTROLS, f"Bot {i}") for i, (x, y) in enumerate(spawns)]
+    for player in players:
+        player.speed = speed
+    swarm = RaceSwarm(maze, [x for x, _ in spawns], [y for _, y in spawns], speed=speed)
+
+    for move_x, move_y in moves:
+        for player, mx, my in zip(players, move_x, move_y):
+            dx, dy = player.handle_input((mx < 0, mx > 0, my < 0, my > 0))
+            player.move(dx, dy, maze)
+        swarm.step(*swarm.velocities(numpy.array(move_x), numpy.array(move_y)))
+    return maze, players, swarm
+
+@pytest.mark.parametrize("speed", [6, 30, 55, 130])
+def test_swarm_matches_race_players(speed):
+    maze, players, swarm = run_race(speed)
+    for i, player in enumerate(players):
+        assert (player.x, player.y) == (swarm.x[i], swarm.y[i]), f"agent {i}"
+        assert not maze.collides(player.rect)
+
+def test_swarm_finish_matches_player_rects():
+    maze, players, swarm = run_race(30)
+    finish = pygame.Rect(0, 0, 300, 400)
+    arrived = set(swarm.check_finish(finish).tolist())
+    assert arrived
+    assert arrived == {i for i, player in enumerate(players) if player.rect.colliderect(finish)}
+    assert swarm.finished[list(arrived)].all()
@@ -0,0 +1,67 @@
+import pygame
+
+from ui import RetainedScreen
+
+class Box:
+    """A widget that is red, or green while hovered"""
+    def __init__(self, x, y):
+        self.rect = pygame.Rect(x, y, 40, 20)
+        self.is_hovered = False
+        self.draws = 0
+
+    def draw(self, surface):
+        self.draws += 1
+        pygame.draw.rect(surface, (0, 255, 0) if self.is_hovered else (255, 0, 0), self.rect)
+
+def make_screen():
+    screen = RetainedScreen("menu", (200, 100))
+    screen.background.fill((10, 10, 60))
+    return screen, screen.add(Box(10, 10)), screen.add(Box(100, 50))
+
+def repainted(mouse_pos):
+    """The same screen painted from scratch"""
+    fresh = make_screen()[0]
+    surface = pygame.Surface((200, 100))
+    fresh.update(surface, mouse_pos)
+    return pygame.image.tobytes(surface, "RGB")
+
+def test_first_update_paints_everything():
+    screen, first, second = make_screen()
+    surface = pygame.Surface((200, 100))
+    screen.update(surface, (0, 0))
+    assert screen.dirty == [surface.get_rect()]
+    assert (first.draws, second.draws) == (1, 1)
+
+def test_still_mouse_repaints_nothing():
+    screen, first, second = make_screen()
+    surface = pygame.Surface((200, 100))
+    screen.update(surface, (0, 0))
+    screen.dirty = []
+    screen.update(surface, (1, 1))
+    assert screen.dirty == []
+    assert (first.draws, second.draws) == (1, 1)
+
+def test_hover_repaints_only_that_widget():
+    screen, first, second = make_screen()
+    surface = pygame.Surface((200, 100))
+    screen.update(surface, (0, 0))
+    screen.dirty = []
+
+    screen.update(surface, (110, 55))
+    assert screen.dirty == [second.rect]
+    assert (first.draws, second.draws) == (1, 2)
+    assert pygame.image.tobytes(surface, "RGB") == repainted((110, 55))
+
+    screen.dirty = []
+    screen.update(surface, (0, 0))
+    assert screen.dirty == [second.rect]
+    assert pygame.image.tobytes(surface, "RGB") == repainted((0, 0))
+
+def test_invalidate_paints_everything_again():
+    screen, first, second = make_screen()
+    surface = pygame.Surface((200, 100))
+    screen.update(surface, (0, 0))
+    screen.invalidate()
+    screen.update(surface, (0, 0))
+    assert screen.dirty == [surface.get_rect()]
+    assert (first.draws, second.draws) == (2, 2)
@@ -0,0 +1,46 @@
+TICK_RATE = 60  # Simulation ticks per second
+MAX_TICKS_PER_FRAME = 5  # Ticks simulated per rendered frame before time is dropped
+
+# ==========================
+# FIXED TIMESTEP
+# ==========================
+class FixedTimestep:
+    """Turn real time into a whole number of fixed-length simulation ticks.
+
+    advance() is called once per rendered frame and returns how many ticks to
+    simulate; `alpha` is how far the leftover time is into the next tick, for
+    drawing between the previous and current simulation state. When more than
+    `max_ticks` are due at once (a long stall or loading a level), the excess
+    is dropped so the game slows down briefly instead of never catching up.
+    """
+    def __init__(self, tick_rate=TICK_RATE, max_ticks=MAX_TICKS_PER_FRAME):
+        self.tick_rate = tick_rate
+        self.tick_ms = 1000.0 / tick_rate
+        self.max_ticks = max_ticks
+        self.accumulator = 0.0
+        self.last_time = None
+
+    def reset(self, now_ms=None):
+        """Forget any time owed, e.g. after loading a level"""
+        self.accumulator = 0.0
+        self.last_time = now_ms
+
+    def advance(self, now_ms):
+        """Add the time since the last call and return the ticks to simulate"""
+        if self.last_time is None:
+            self.last_time = now_ms
+            return 0
+
+        self.accumulator += max(0, now_ms - self.last_time)
+        self.last_time = now_ms
+
+        ticks = int(self.accumulator // self.tick_ms)
+        if ticks > self.max_ticks:
+            ticks = self.max_ticks
+            self.accumulator = self.accumulator % self.tick_ms + ticks * self.tick_ms
+        self.accumulator -= ticks * self.tick_ms
+        return ticks
+
+    @property
+    def alpha(self):
+        return min(1.0, self.accumulator / self.tick_ms)
@@ -0,0 +1,63 @@
+import pygame
+
+# ==========================
+# RETAINED SCREEN
+# ==========================
+class RetainedScreen:
+    """A menu screen painted once and then patched only where it changes.
+
+    `background` holds everything that never changes (fill, titles, text)
+    and widgets are the parts that react to the mouse: anything with a
+    `rect`, an `is_hovered` flag and draw(surface), drawn inside its rect.
+    update() paints the whole screen the first time, and after that repaints
+    only the widgets whose hover state flipped. present() pushes just those
+    rects to the display, so a menu nobody touches costs no drawing at all.
+    """
+    def __init__(self, name, size):
+        self.name = name  # The game state this screen belongs to
+        self.background = pygame.Surface(size)
+        self.widgets = []
+        self.dirty = []  # Screen rects changed since the last present()
+        self.needs_render = True
+
+    def add(self, widget):
+        self.widgets.append(widget)
+        return widget
+
+    def invalidate(self):
+        """Paint everything again on the next update(), e.g. after the window was uncovered"""
+        self.needs_render = True
+
+    def render(self, surface):
+        surface.blit(self.background, (0, 0))
+        for widget in self.widgets:
+            widget.draw(surface)
+        self.dirty = [surface.get_rect()]
+        self.needs_render = False
+
+    def redraw(self, surface, widget):
+        """Repaint one widget over the background behind it"""
+        surface.blit(self.background, widget.rect, widget.rect)
+        widget.draw(surface)
+        self.dirty.append(widget.rect.clip(surface.get_rect()))
+
+    def update(self, surface, mouse_pos):
+        """Follow the mouse and repaint whatever that changed"""
+        changed = []
+        for widget in self.widgets:
+            hovered = bool(widget.rect.collidepoint(mouse_pos))
+            if hovered != widget.is_hovered:
+                widget.is_hovered = hovered
+                changed.append(widget)
+
+        if self.needs_render:
+            self.render(surface)
+        else:
+            for widget in changed:
+                self.redraw(surface, widget)
+
+    def present(self):
+        """Push the changed rects to the display"""
+        if self.dirty:
+            pygame.display.update(self.dirty)
+            self.dirty = []